@@ -0,0 +1,157 @@
+"""
+------------------------------------------------------------
+CACHE DE EXCEL – Lectura de archivos de entrada sin re-parsear
+------------------------------------------------------------
+Autor: Héctor + IA (2025)
+------------------------------------------------------------
+Guarda una copia binaria (pickle de pandas) de cada hoja leída con
+pd.read_excel. La copia se identifica por el contenido del archivo
+(SHA-256), y la huella ruta + tamaño + fecha de modificación evita
+recalcular el hash cuando el archivo no ha cambiado. Cuando las copias y
+sus índices superan LIMITE_CACHE_MB se borran los usados hace más tiempo
+(LRU). Una copia ilegible (corrupta o de otra versión de pandas) se
+descarta y el Excel se vuelve a leer.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+# ------------------------------------------------------------
+# CONFIGURACIÓN
+# ------------------------------------------------------------
+CACHE_DIR = Path(".cache_ans")
+LIMITE_CACHE_MB = 200
+
+_INDICE = re.compile(r"[0-9a-f]{40}\.json")  # índice por archivo (otros JSON de la carpeta no cuentan)
+
+
+# ------------------------------------------------------------
+# FUNCIONES AUXILIARES
+# ------------------------------------------------------------
+def hash_archivo(ruta, bloque=1 << 20):
+    """SHA-256 del contenido del archivo, leído por bloques."""
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for parte in iter(lambda: f.read(bloque), b""):
+            h.update(parte)
+    return h.hexdigest()
+
+
+def _eliminar(ruta):
+    """Borra un archivo o una carpeta, si existe."""
+    if ruta.is_dir():
+        shutil.rmtree(ruta)
+    elif ruta.exists():
+        ruta.unlink()
+
+
+def escribir_atomico(ruta, escribir, conservar_extension=False):
+    """
+    Escritura común de todas las salidas: escribir(tmp) genera el contenido en un
+    temporal de la misma carpeta y luego se renombra sobre `ruta`, así nadie lee
+    un archivo a medias. El temporal lleva proceso e hilo en el nombre y termina
+    en .tmp (no lo toman los patrones de la cache); con conservar_extension el
+    nombre termina en la extensión de `ruta` (los escritores de Excel la piden).
+    Un destino carpeta (Parquet particionado) se borra antes de renombrar.
+    PermissionError si el destino está abierto en Excel (Windows); el temporal
+    nunca queda en disco.
+    """
+    ruta = Path(ruta)
+    sufijo = f"{os.getpid()}.{threading.get_ident()}"
+    tmp = ruta.with_name(f"{ruta.stem}.{sufijo}.tmp{ruta.suffix}" if conservar_extension else f"{ruta.name}.{sufijo}.tmp")
+    _eliminar(tmp)
+    try:
+        escribir(tmp)
+        if ruta.is_dir() or tmp.is_dir():
+            _eliminar(ruta)
+        os.replace(tmp, ruta)
+    finally:
+        _eliminar(tmp)
+    return ruta
+
+
+def _clave(origen, sheet_name, opciones):
+    """Identificador estable de (origen, hoja, opciones de lectura); origen = ruta absoluta o hash del contenido."""
+    texto = f"{origen}|{sheet_name}|{sorted(opciones.items())}"
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+def _archivos_cache(cache_dir):
+    """(ruta, stat) de las copias *.pkl y de los índices por archivo; omite los que otro proceso ya borró."""
+    archivos = []
+    for ruta in Path(cache_dir).iterdir():
+        if ruta.suffix != ".pkl" and not _INDICE.fullmatch(ruta.name):
+            continue
+        try:
+            archivos.append((ruta, ruta.stat()))
+        except FileNotFoundError:
+            continue
+    return archivos
+
+
+def limpiar_cache(cache_dir=CACHE_DIR, limite_mb=LIMITE_CACHE_MB):
+    """Borra las copias e índices menos usados hasta que la carpeta quede bajo el límite."""
+    archivos = sorted(_archivos_cache(cache_dir), key=lambda a: a[1].st_mtime)
+    total = sum(estado.st_size for _, estado in archivos)
+    limite = limite_mb * 1024 * 1024
+    for ruta, estado in archivos:
+        if total <= limite:
+            break
+        total -= estado.st_size
+        ruta.unlink(missing_ok=True)
+
+
+# ------------------------------------------------------------
+# LECTURA CON CACHE
+# ------------------------------------------------------------
+def leer_excel_cacheado(ruta, sheet_name=0, cache_dir=CACHE_DIR, limite_mb=LIMITE_CACHE_MB, **opciones):
+    """Igual que pd.read_excel(ruta, sheet_name), pero reutiliza la copia guardada si el archivo no cambió."""
+    ruta = Path(ruta)
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    estado = ruta.stat()
+    huella = {"ruta": str(ruta.resolve()), "tamano": estado.st_size, "mtime_ns": estado.st_mtime_ns}
+    indice = cache_dir / f"{_clave(huella['ruta'], sheet_name, opciones)}.json"
+
+    # 🔹 Si la huella coincide, no hace falta recalcular el hash del contenido
+    try:
+        registro = json.loads(indice.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):  # sin índice, borrado por la limpieza o a medio escribir
+        registro = {}
+    if all(registro.get(k) == v for k, v in huella.items()) and "hash" in registro:
+        contenido = registro["hash"]
+    else:
+        contenido = hash_archivo(ruta)
+
+    # La copia depende solo del contenido: el mismo libro leído desde otra carpeta la reutiliza
+    copia = cache_dir / f"{contenido[:32]}_{_clave(contenido, sheet_name, opciones)[:12]}.pkl"
+    df = None
+    try:
+        df = pd.read_pickle(copia)
+        os.utime(copia)  # marca de uso para el LRU
+        print(f"⚡ Cache: {ruta.name} sin cambios, se reutiliza la lectura anterior.")
+    except FileNotFoundError:
+        pass  # no existe o la borró otro proceso al limpiar la cache
+    except Exception as e:
+        print(f"⚠️ Cache: copia ilegible de {ruta.name} ({type(e).__name__}), se vuelve a leer el Excel.")
+        copia.unlink(missing_ok=True)
+        df = None
+
+    if df is None:
+        df = pd.read_excel(ruta, sheet_name=sheet_name, **opciones)
+        escribir_atomico(copia, df.to_pickle)
+        limpiar_cache(cache_dir, limite_mb)
+
+    escribir_atomico(
+        indice,
+        lambda tmp: tmp.write_text(json.dumps({**huella, "hash": contenido}), encoding="utf-8"),
+    )
+    return df
@@ -0,0 +1,89 @@
+"""
+------------------------------------------------------------
+CATEGORÍAS – Columnas de pocos valores como pandas Categorical
+------------------------------------------------------------
+Autor: Héctor + IA (2025)
+------------------------------------------------------------
+MUNICIPIO, ZONA, SECTOR, ESTADO y TIPO_DATASET tienen unas decenas de
+valores distintos repetidos en miles de filas. Aquí se guardan como
+category y las limpiezas de texto se aplican a los valores distintos
+(una vez cada uno) en lugar de fila por fila.
+"""
+
+import numpy as np
+import pandas as pd
+
+COLUMNAS_CATEGORICAS = ["MUNICIPIO", "ZONA", "SECTOR", "ESTADO", "TIPO_DATASET"]
+
+
+def es_categorica(serie):
+    return isinstance(serie.dtype, pd.CategoricalDtype)
+
+
+def factorizar(serie):
+    """Devuelve (códigos, valores distintos); el vacío cuenta como un valor más."""
+    if es_categorica(serie):
+        codigos = serie.cat.codes.to_numpy().copy()
+        unicos = list(serie.cat.categories)
+        if (codigos == -1).any():
+            codigos[codigos == -1] = len(unicos)
+            unicos.append(np.nan)
+        return codigos, pd.Series(unicos, dtype=object)
+    codigos, unicos = pd.factorize(serie)
+    unicos = list(unicos)
+    nulos = codigos == -1
+    if nulos.any():
+        # None, NaN y pd.NA se mantienen separados (str() da "None", "nan" y "<NA>")
+        valores_nulos = pd.Series(serie).iloc[nulos]
+        tipos, _ = pd.factorize(valores_nulos.map(type))
+        primeros = pd.Series(range(len(tipos))).groupby(tipos).first().to_numpy()
+        codigos[nulos] = len(unicos) + tipos
+        unicos.extend(valores_nulos.iloc[primeros])
+    return codigos, pd.Series(unicos, dtype=object)
+
+
+def a_categoria(serie, transformar=None):
+    """
+    Convierte la serie a category aplicando `transformar` (Series de valores
+    distintos → Series del mismo largo) a cada valor distinto una sola vez.
+    Las categorías quedan ordenadas alfabéticamente.
+    """
+    codigos, unicos = factorizar(serie)
+    nuevos = unicos if transformar is None else pd.Series(transformar(unicos), dtype=object)
+    nuevos_codigos, categorias = pd.factorize(nuevos.to_numpy(dtype=object))
+    resultado = pd.Series(
+        pd.Categorical.from_codes(nuevos_codigos[codigos], categorias),
+        index=serie.index,
+        name=serie.name,
+    )
+    try:
+        return resultado.cat.reorder_categories(sorted(categorias))
+    except TypeError:  # categorías de tipos mezclados: se deja el orden de aparición
+        return resultado
+
+
+def categorizar(df, columnas=COLUMNAS_CATEGORICAS):
+    """Pasa a category las columnas indicadas que existan en df (en el mismo DataFrame)."""
+    for col in columnas:
+        if col not in df.columns:
+            continue
+        if es_categorica(df[col]):
+            df[col] = df[col].cat.remove_unused_categories()
+        else:
+            df[col] = a_categoria(df[col])
+    return df
+
+
+def quitar_categorias(serie, valores):
+    """Convierte en vacío las filas con alguno de `valores` (quita esas categorías)."""
+    presentes = [v for v in valores if v in serie.cat.categories]
+    return serie.cat.remove_categories(presentes) if presentes else serie
+
+
+def rellenar_categoria(serie, valor):
+    """fillna para columnas category: agrega `valor` a las categorías si hace falta."""
+    if not serie.isna().any():
+        return serie
+    if valor not in serie.cat.categories:
+        serie = serie.cat.add_categories([valor])
+    return serie.fillna(valor)
@@ -0,0 +1,200 @@
+"""
+------------------------------------------------------------
+DAEMON ANS – Actualización automática sin panel (sin Tk)
+------------------------------------------------------------
+Autor: Héctor + IA (2025)
+------------------------------------------------------------
+Revisa data_raw/ cada pocos segundos. Cuando un archivo de programación
+cambia y deja de cambiar durante --espera segundos (Excel y las copias
+de red escriben en varios pasos), ejecuta solo lo necesario:
+  • limpieza de los datasets cuyo archivo cambió
+  • ESTADO recalculado a la hora actual para los demás (sin releerlos)
+  • MERGE + CONTROL DE VACÍOS
+Nunca abre ventanas. Las salidas se escriben en un temporal y se
+renombran; si un archivo de destino está abierto en Excel el ciclo se
+reintenta en la siguiente revisión en lugar de detenerse.
+
+Uso:
+    python daemon_ans.py                      # vigila data_raw/ hasta Ctrl+C
+    python daemon_ans.py --una-vez            # un ciclo y termina (tareas programadas)
+    python daemon_ans.py --refrescar-cada 30  # además recalcula ESTADO cada 30 min
+"""
+
+import argparse
+import time
+from datetime import datetime
+from pathlib import Path
+
+import diagnostico_control
+import escenario1_individual as escenario1
+import merge_escenario2 as merge
+from pipeline_ans import DATASETS
+
+# ------------------------------------------------------------
+# CONFIGURACIÓN
+# ------------------------------------------------------------
+INTERVALO_SEGUNDOS = 5   # Cada cuánto se revisa data_raw/
+ESPERA_SEGUNDOS = 10     # Tiempo sin cambios antes de procesar un archivo
+
+
+def registrar(mensaje):
+    print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {mensaje}", flush=True)
+
+
+# ------------------------------------------------------------
+# VIGILANCIA DE ARCHIVOS
+# ------------------------------------------------------------
+def huella(ruta):
+    """(tamaño, mtime_ns) del archivo, o None si no existe."""
+    try:
+        estado = Path(ruta).stat()
+    except FileNotFoundError:
+        return None
+    return estado.st_size, estado.st_mtime_ns
+
+
+class Vigilante:
+    """
+    Detecta cambios en las entradas de los datasets con espera (debounce):
+    un dataset queda listo cuando su archivo cambió y lleva `espera`
+    segundos sin volver a cambiar.
+    """
+
+    def __init__(self, datasets=DATASETS, espera=ESPERA_SEGUNDOS):
+        self.datasets = datasets
+        self.espera = espera
+        self.huellas = {}      # dataset → última huella procesada
+        self.pendientes = {}   # dataset → (huella vista, momento en que se vio)
+
+    def revisar(self, ahora=None):
+        """Devuelve los datasets listos para procesar (cambiaron y ya están estables)."""
+        ahora = time.monotonic() if ahora is None else ahora
+        listos = []
+        for nombre, rutas in self.datasets.items():
+            actual = huella(rutas["entrada"])
+            if actual is None or actual == self.huellas.get(nombre):
+                self.pendientes.pop(nombre, None)
+                continue
+            vista, desde = self.pendientes.get(nombre, (None, None))
+            if vista != actual:
+                self.pendientes[nombre] = (actual, ahora)  # cambió (otra vez): reinicia la espera
+            elif ahora - desde >= self.espera:
+                listos.append(nombre)
+        return listos
+
+    def marcar_procesado(self, nombre):
+        vista, _ = self.pendientes.pop(nombre, (None, None))
+        self.huellas[nombre] = vista or huella(self.datasets[nombre]["entrada"])
+
+
+# ------------------------------------------------------------
+# CICLO
+# ------------------------------------------------------------
+def actualizar(cambiados, datasets=DATASETS, base_path=merge.base_path, incremental=True, parquet=True):
+    """
+    Limpia los datasets de `cambiados`, recalcula ESTADO de los demás al
+    momento actual y rehace MERGE + CONTROL DE VACÍOS. Sin ventanas.
+    Devuelve los datasets limpiados con éxito. Lanza PermissionError si
+    alguna salida estaba abierta y no se pudo reemplazar.
+    """
+    inicio = time.perf_counter()
+    frames, limpiados = {}, []
+    for nombre, rutas in datasets.items():
+        try:
+            if nombre in cambiados:
+                registrar(f"🧹 Limpiando {nombre} ({Path(rutas['entrada']).name})")
+                frames[nombre] = escenario1.leer_y_limpiar(rutas["entrada"], nombre, incremental=incremental)
+                escenario1.exportar_limpio(frames[nombre], rutas["salida"])
+                limpiados.append(nombre)
+            else:
+                # Si lo guardado salió de otro archivo (o no hay), se limpia rutas["entrada"] completo
+                frames[nombre] = escenario1.corte_guardado(nombre, entrada=rutas["entrada"])
+        except SystemExit as e:
+            registrar(f"⚠️ {nombre} no se incluye: {e}")
+
+    if not frames:
+        registrar("⚠️ No hay datasets disponibles para el MERGE.")
+        return limpiados
+
+    Path(base_path).mkdir(parents=True, exist_ok=True)
+    resultado = merge.ejecutar_merge(frames, gui=False, base_path=Path(base_path), parquet=parquet)
+    if resultado.salidas_bloqueadas:
+        bloqueada = resultado.salidas_bloqueadas[0]
+        raise PermissionError(13, "archivo abierto", str(bloqueada))
+    diagnostico_control.controlar_vacios(base_path=base_path, gui=False)
+    registrar(f"✅ Actualización completa en {time.perf_counter() - inicio:.1f} s "
+              f"(limpiados: {', '.join(limpiados) or 'ninguno'}).")
+    return limpiados
+
+
+def ciclo(vigilante, forzar=(), refrescar=False, **opciones):
+    """
+    Una revisión: procesa lo que esté listo. Devuelve False si una salida
+    estaba abierta (los cambios quedan pendientes y se reintentan).
+    """
+    listos = sorted(set(vigilante.revisar()) | set(forzar))
+    if not listos and not refrescar:
+        return True
+    if listos:
+        registrar(f"🔔 Cambios detectados: {', '.join(listos)}")
+    else:
+        registrar("🕒 Recalculando ESTADO a la hora actual.")
+    try:
+        actualizar(listos, datasets=vigilante.datasets, **opciones)
+    except PermissionError as e:
+        registrar(f"🔒 Un archivo de salida está abierto ({e.filename}). Se reintenta en la próxima revisión.")
+        return False
+    except SystemExit as e:
+        # Error en los datos (estructura, archivos): se avisa una vez y se espera al próximo cambio
+        registrar(f"❌ {e}")
+    for nombre in listos:
+        vigilante.marcar_procesado(nombre)
+    return True
+
+
+# ------------------------------------------------------------
+# EJECUCIÓN
+# ------------------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Actualización automática del ANS al cambiar data_raw/.")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_SEGUNDOS,
+                        help="Segundos entre revisiones de data_raw/.")
+    parser.add_argument("--espera", type=float, default=ESPERA_SEGUNDOS,
+                        help="Segundos sin cambios antes de procesar un archivo.")
+    parser.add_argument("--refrescar-cada", type=float, default=0,
+                        help="Minutos entre recálculos de ESTADO aunque no haya cambios (0 = nunca).")
+    parser.add_argument("--una-vez", action="store_true",
+                        help="Procesa todos los datasets una vez y termina.")
+    parser.add_argument("--completo", action="store_true",
+                        help="Limpia todas las filas (sin --incremental).")
+    parser.add_argument("--sin-parquet", action="store_true",
+                        help="No genera MERGE_ANS_FINAL.parquet.")
+    parser.add_argument("--carpeta-salida", default=str(merge.base_path),
+                        help="Carpeta del MERGE y del control de vacíos.")
+    args = parser.parse_args(argv)
+
+    opciones = {"base_path": args.carpeta_salida, "incremental": not args.completo, "parquet": not args.sin_parquet}
+    vigilante = Vigilante(espera=args.espera)
+    todos = [n for n, r in DATASETS.items() if huella(r["entrada"]) is not None]
+
+    # 🔹 Primer ciclo: todo lo que exista en data_raw/
+    al_dia = ciclo(vigilante, forzar=todos, **opciones)
+    if args.una_vez:
+        raise SystemExit(0 if al_dia else 1)
+
+    registrar(f"👀 Vigilando {Path(next(iter(DATASETS.values()))['entrada']).parent}/ "
+              f"cada {args.intervalo:g} s (Ctrl+C para salir).")
+    # Lo que no se pudo escribir queda en vigilante.pendientes y vuelve a salir en revisar()
+    ultimo_refresco = time.monotonic()
+    try:
+        while True:
+            time.sleep(args.intervalo)
+            refrescar = args.refrescar_cada > 0 and time.monotonic() - ultimo_refresco >= args.refrescar_cada * 60
+            if ciclo(vigilante, refrescar=refrescar, **opciones) and refrescar:
+                ultimo_refresco = time.monotonic()
+    except KeyboardInterrupt:
+        registrar("👋 Daemon detenido.")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,63 +4,89 @@ CONTROL DE VACÍOS – Proyecto ANS
 ------------------------------------------------------------
 Autor: Héctor + IA (2025)
 ------------------------------------------------------------
+Uso como módulo (sin ventanas):
+    controlar_vacios()
+Uso como script:
+    python diagnostico_control.py
 """
 
 import pandas as pd
 from pathlib import Path
-import tkinter as tk
-from tkinter import messagebox
+
+from exportar_excel import escribir_excel
+from merge_escenario2 import mostrar_mensaje
+from perfil_calidad import NOMBRE_INFORME, cargar_informe, perfilar
 
 # ------------------------------------------------------------
 # CONFIGURACIÓN INICIAL
 # ------------------------------------------------------------
 base_path = Path("data_clean")
-ruta_merge = base_path / "MERGE_ANS_FINAL.xlsx"   # ✅ ahora lee el archivo final, no el original
-salida_informe = base_path / "Pedidos_incompletos.xlsx"
 
-# ------------------------------------------------------------
-# CREAR VENTANA OCULTA
-# ------------------------------------------------------------
-root = tk.Tk()
-root.withdraw()
 
 # ------------------------------------------------------------
-# CARGA DE DATOS
+# CONTROL DE VACÍOS
 # ------------------------------------------------------------
-if not ruta_merge.exists():
-    messagebox.showerror("Error", "No se encontró el archivo MERGE_ANS_FINAL.xlsx.\nEjecuta primero el merge consolidado.")
-    raise SystemExit("❌ No se encontró el archivo MERGE_ANS_FINAL.xlsx.")
+def controlar_vacios(base_path=base_path, gui=False):
+    """Genera Pedidos_incompletos.xlsx a partir de MERGE_ANS_FINAL. Devuelve las filas incompletas."""
+    base_path = Path(base_path)
+    ruta_merge = base_path / "MERGE_ANS_FINAL.xlsx"   # ✅ lee el archivo final, no el original
+    salida_informe = base_path / "Pedidos_incompletos.xlsx"
+    ruta_perfil = base_path / NOMBRE_INFORME           # informe que deja el MERGE (sin releer el Excel)
 
-df = pd.read_excel(ruta_merge)
-print(f"📂 Archivo cargado correctamente: {len(df)} registros")
+    # ------------------------------------------------------------
+    # CARGA DE DATOS
+    # ------------------------------------------------------------
+    if not ruta_merge.exists():
+        if gui:
+            mostrar_mensaje("Error", "No se encontró el archivo MERGE_ANS_FINAL.xlsx.\n"
+                                     "Ejecuta primero el merge consolidado.", tipo="error")
+        raise SystemExit("❌ No se encontró el archivo MERGE_ANS_FINAL.xlsx.")
 
-# ------------------------------------------------------------
-# DETECCIÓN DE CELDAS VACÍAS
-# ------------------------------------------------------------
-df_incompletos = df[df.isin(["SIN DATO", "NAN", "", None]).any(axis=1)]
-resumen = df.isin(["SIN DATO", "NAN", "", None]).sum().reset_index()
-resumen.columns = ["Columna", "Valores_Vacíos"]
+    informe = cargar_informe(ruta_perfil, origen=ruta_merge)
+    if informe is not None:
+        perfil, df_incompletos = informe
+        print(f"⚡ Informe del MERGE reutilizado: {perfil.filas} registros (sin releer {ruta_merge.name})")
+    else:
+        # ------------------------------------------------------------
+        # DETECCIÓN DE CELDAS VACÍAS (respaldo: informe ausente o desactualizado)
+        # ------------------------------------------------------------
+        df = pd.read_excel(ruta_merge)
+        print(f"📂 Archivo cargado correctamente: {len(df)} registros")
+        perfil = perfilar(df)
+        df_incompletos = df[perfil.filas_incompletas]
 
-# ------------------------------------------------------------
-# EXPORTACIÓN DEL INFORME
-# ------------------------------------------------------------
-with pd.ExcelWriter(salida_informe, engine="openpyxl") as writer:
-    df_incompletos.to_excel(writer, sheet_name="Pedidos Incompletos", index=False)
-    resumen.to_excel(writer, sheet_name="Resumen Vacíos", index=False)
+    resumen = perfil.resumen_indicadores()
 
-print(f"\n📊 Informe generado: {salida_informe}")
-print(f"🚨 Pedidos con información incompleta: {len(df_incompletos)}")
+    # ------------------------------------------------------------
+    # EXPORTACIÓN DEL INFORME
+    # ------------------------------------------------------------
+    escribir_excel(salida_informe, {
+        "Pedidos Incompletos": df_incompletos,
+        "Resumen Vacíos": resumen,
+    })
 
-# ------------------------------------------------------------
-# MENSAJE FINAL
-# ------------------------------------------------------------
-messagebox.showinfo(
-    "Control de Vacíos",
-    f"Se detectaron {len(df_incompletos)} pedidos con datos incompletos.\n\n"
-    f"✅ MERGE_ANS_FINAL.xlsx se mantuvo intacto.\n"
-    f"📄 Informe exportado: {salida_informe.name}\n\n"
-    f"Envía este archivo al usuario responsable para revisión de datos."
-)
-
-print("\n✅ CONTROL DE VACÍOS completado sin modificar el MERGE_ANS_FINAL.")
-root.destroy()
+    print(f"\n📊 Informe generado: {salida_informe}")
+    print(f"🚨 Pedidos con información incompleta: {len(df_incompletos)}")
+
+    # ------------------------------------------------------------
+    # MENSAJE FINAL
+    # ------------------------------------------------------------
+    if gui:
+        mostrar_mensaje(
+            "Control de Vacíos",
+            f"Se detectaron {len(df_incompletos)} pedidos con datos incompletos.\n\n"
+            f"✅ MERGE_ANS_FINAL.xlsx se mantuvo intacto.\n"
+            f"📄 Informe exportado: {salida_informe.name}\n\n"
+            f"Envía este archivo al usuario responsable para revisión de datos."
+        )
+
+    print("\n✅ CONTROL DE VACÍOS completado sin modificar el MERGE_ANS_FINAL.")
+    return df_incompletos
+
+
+def main():
+    controlar_vacios(gui=True)
+
+
+if __name__ == "__main__":
+    main()
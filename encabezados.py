@@ -0,0 +1,220 @@
+"""
+------------------------------------------------------------
+ENCABEZADOS – Mapeo de columnas compilado por firma de encabezado
+------------------------------------------------------------
+Autor: Héctor + IA (2025)
+------------------------------------------------------------
+Cada archivo de programación trae sus propios nombres de columna. El
+mapeo hacia los nombres que usa la limpieza (PEDIDO, MUNICIPIO,
+FECHA_INGRESO, ZONA…) se calcula una sola vez por firma de encabezado
+(la tupla de nombres originales) y se guarda en JSON, así que las
+ejecuciones siguientes con el mismo formato de libro no repiten el trabajo.
+La clave incluye también una huella de las reglas (REGLAS_RENOMBRE, R/U y
+VERSION_MAPEO): si se edita una regla, los mapeos guardados dejan de usarse.
+El JSON también sirve para revisar qué columnas no se reconocieron o
+quedaron ambiguas.
+
+Uso:
+    python encabezados.py "data_raw/PROGRAMACION HV SUR 2025.xlsx"
+    python encabezados.py --listar
+"""
+
+import argparse
+import hashlib
+import json
+import re
+from pathlib import Path
+
+from cache_excel import CACHE_DIR, escribir_atomico
+
+# ------------------------------------------------------------
+# CONFIGURACIÓN
+# ------------------------------------------------------------
+MAPEOS_DIR = CACHE_DIR / "encabezados"
+
+# Subir este número si cambia la forma de mapear sin tocar REGLAS_RENOMBRE ni NOMBRES_RU
+VERSION_MAPEO = 1
+
+# (destino, condición sobre el nombre compacto). Gana la primera que aplique.
+REGLAS_RENOMBRE = [
+    ("PEDIDO", lambda c: "PEDIDO" in c),
+    ("MUNICIPIO", lambda c: "MPIO" in c or "MUNICIPIO" in c),
+    ("FECHA_INGRESO", lambda c: "FECHAINGRESO" in c),
+    ("FECHA_INICIO_ANS", lambda c: "FECHAINICIO" in c and "ANS" in c),
+    ("ACTIVIDAD", lambda c: "ACTIVIDAD" in c),
+    ("SECTOR", lambda c: "SECTOR" in c),
+    ("ESTADO_DIGITADO", lambda c: c in ["EST", "ESTADO", "STATUS"]),
+]
+
+NOMBRES_RU = ["RU", "R/U", "R∕U", "R_U"]
+
+_NO_PERMITIDOS = re.compile(r"[^A-Z0-9_/ ]")
+_MAPEOS = {}  # cache en memoria: firma → mapeo
+
+
+# ------------------------------------------------------------
+# CONSTRUCCIÓN DEL MAPEO
+# ------------------------------------------------------------
+def normalizar_encabezado(col):
+    """Mayúsculas, sin tildes ni símbolos (solo A-Z, 0-9, _, / y espacio)."""
+    return _NO_PERMITIDOS.sub("", str(col).strip().upper()).replace("  ", " ")
+
+
+def _compacto(col):
+    return col.strip().upper().replace("_", "").replace("-", "").replace(" ", "")
+
+
+def es_columna_ru(col):
+    """True si el nombre corresponde a la columna R/U (zona urbana/rural)."""
+    return col.replace(" ", "").replace("/", "").replace("\\", "").upper() in NOMBRES_RU
+
+
+def construir_mapeo(columnas):
+    """
+    Calcula el mapeo para una lista de nombres originales:
+      posiciones  → columnas que se conservan (quita duplicadas tras normalizar)
+      nombres     → nombre final de cada columna conservada
+      renombres   → {original: destino} solo de las columnas reconocidas
+      sin_mapear  → columnas conservadas que no corresponden a ningún destino
+      ambiguas    → {destino: [originales]} cuando más de una columna cae en el mismo destino
+    """
+    posiciones, normalizados, vistos = [], [], set()
+    for i, col in enumerate(columnas):
+        norm = normalizar_encabezado(col)
+        base = norm.strip().upper()
+        if base not in vistos:
+            vistos.add(base)
+            posiciones.append(i)
+            normalizados.append(norm)
+
+    nombres, reconocidas = [], []
+    for norm in normalizados:
+        compacto = _compacto(norm)
+        destino = next((d for d, aplica in REGLAS_RENOMBRE if aplica(compacto)), None)
+        nombres.append(destino or norm)
+        reconocidas.append(destino is not None)
+
+    # Columna R/U → ZONA (la primera que aparezca, después de renombrar)
+    ru = next((j for j, n in enumerate(nombres) if es_columna_ru(n)), None)
+    if ru is not None:
+        nombres[ru] = "ZONA"
+        reconocidas[ru] = True
+
+    originales = [str(columnas[i]) for i in posiciones]
+    renombres = {o: n for o, n, ok in zip(originales, nombres, reconocidas) if ok}
+    destinos = {}
+    for o, n in renombres.items():
+        destinos.setdefault(n, []).append(o)
+
+    return {
+        "firma": [str(c) for c in columnas],
+        "posiciones": posiciones,
+        "nombres": nombres,
+        "renombres": renombres,
+        "sin_mapear": [o for o in originales if o not in renombres],
+        "ambiguas": {d: cols for d, cols in destinos.items() if len(cols) > 1},
+    }
+
+
+# ------------------------------------------------------------
+# CACHE EN DISCO
+# ------------------------------------------------------------
+def _huella_codigo(funcion):
+    """Bytecode, constantes y nombres de una función (cambia si se edita la regla)."""
+    codigo = funcion.__code__
+    constantes = tuple(c.co_code.hex() if hasattr(c, "co_code") else c for c in codigo.co_consts)
+    return codigo.co_code.hex(), constantes, codigo.co_names
+
+
+def firma_reglas():
+    """Huella de todo lo que decide el mapeo: reglas de renombre, R/U, normalización y versión."""
+    partes = [
+        VERSION_MAPEO,
+        [(destino, _huella_codigo(aplica)) for destino, aplica in REGLAS_RENOMBRE],
+        NOMBRES_RU,
+        _NO_PERMITIDOS.pattern,
+        [_huella_codigo(f) for f in (normalizar_encabezado, _compacto, es_columna_ru, construir_mapeo)],
+    ]
+    return hashlib.sha1(repr(partes).encode("utf-8")).hexdigest()
+
+
+FIRMA_REGLAS = firma_reglas()
+
+
+def clave_firma(columnas):
+    """Identificador estable de la tupla de nombres originales y de las reglas vigentes."""
+    texto = json.dumps([FIRMA_REGLAS, [str(c) for c in columnas]])
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+def obtener_mapeo(columnas, mapeos_dir=MAPEOS_DIR):
+    """Devuelve (mapeo, nuevo): desde memoria, desde el JSON guardado o calculándolo y guardándolo."""
+    clave = clave_firma(columnas)
+    if clave in _MAPEOS:
+        return _MAPEOS[clave], False
+
+    ruta = Path(mapeos_dir) / f"{clave}.json"
+    mapeo, nuevo = None, False
+    if ruta.exists():
+        guardado = json.loads(ruta.read_text(encoding="utf-8"))
+        if guardado.get("firma") == [str(c) for c in columnas] and guardado.get("reglas") == FIRMA_REGLAS:
+            mapeo = guardado
+    if mapeo is None:
+        mapeo, nuevo = {**construir_mapeo(columnas), "reglas": FIRMA_REGLAS}, True
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        escribir_atomico(ruta, lambda tmp: tmp.write_text(json.dumps(mapeo, ensure_ascii=False, indent=2), encoding="utf-8"))
+
+    _MAPEOS[clave] = mapeo
+    return mapeo, nuevo
+
+
+def aplicar_mapeo(df, dataset=""):
+    """Deja df con las columnas conservadas y renombradas según el mapeo de su encabezado."""
+    mapeo, nuevo = obtener_mapeo(list(df.columns))
+    if nuevo:
+        imprimir_mapeo(mapeo, dataset)
+    df = df.iloc[:, mapeo["posiciones"]]
+    df.columns = mapeo["nombres"]
+    return df
+
+
+def imprimir_mapeo(mapeo, titulo=""):
+    print(f"🧾 Encabezados {titulo}: {len(mapeo['renombres'])} columnas reconocidas de {len(mapeo['posiciones'])}.")
+    for original, destino in mapeo["renombres"].items():
+        print(f"   {original} → {destino}")
+    if mapeo["ambiguas"]:
+        for destino, cols in mapeo["ambiguas"].items():
+            print(f"⚠️ Varias columnas quedan como {destino}: {', '.join(cols)}")
+    if mapeo["sin_mapear"]:
+        print(f"   Sin mapear: {', '.join(mapeo['sin_mapear'])}")
+
+
+# ------------------------------------------------------------
+# EJECUCIÓN
+# ------------------------------------------------------------
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Muestra el mapeo de encabezados de un archivo de programación.")
+    parser.add_argument("archivo", nargs="?", help="Excel o CSV a revisar.")
+    parser.add_argument("--listar", action="store_true", help="Lista los mapeos guardados.")
+    args = parser.parse_args()
+
+    if args.listar:
+        for ruta in sorted(MAPEOS_DIR.glob("*.json")):
+            imprimir_mapeo(json.loads(ruta.read_text(encoding="utf-8")), ruta.stem[:12])
+        return
+    if not args.archivo:
+        parser.error("indica un archivo o --listar")
+
+    archivo = Path(args.archivo)
+    if archivo.suffix.lower() == ".csv":
+        from ingesta_fenix import detectar_codificacion
+        columnas = pd.read_csv(archivo, nrows=0, encoding=detectar_codificacion(archivo)).columns
+    else:
+        columnas = pd.read_excel(archivo, nrows=0).columns
+    imprimir_mapeo(obtener_mapeo(list(columnas))[0], archivo.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,74 +7,72 @@ Autor: Héctor + IA (2025)
 """
 
 import argparse
+import re
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 
+from cache_excel import leer_excel_cacheado
+from categorias import categorizar, factorizar
+from exportar_excel import escribir_excel
+from encabezados import FIRMA_REGLAS, aplicar_mapeo
+from estado_incremental import (cargar_estado, cargar_estatico, cargar_indice, firma, guardar_estado,
+                                guardar_estatico, guardar_indice, hash_filas)
+from festivos_colombia import calendario_habil, rango_anios
+from indice_pedidos import entradas_indice, filas_repetidas, revisar_dataset
+from ingesta_fenix import FILAS_POR_BLOQUE, leer_pendientes
+from normalizacion import PERFILES, PLEGADO, normalizar_columna
+
 # ------------------------------------------------------------
 # CONFIGURACIÓN GENERAL
 # ------------------------------------------------------------
 WEEKMASK = "1111100"  # Lunes a viernes hábiles
 
-# Lista de días festivos nacionales (puedes ampliarla con los que maneja tu empresa o EPM)
-# ------------------------------------------------------------
-# LISTA DE FESTIVOS NACIONALES (2025–2026)
-# ------------------------------------------------------------
-FESTIVOS = [
-    # 2025
-    "2025-01-01",  # Año Nuevo
-    "2025-01-06",  # Reyes Magos
-    "2025-03-24",  # San José (trasladado)
-    "2025-04-17",  # Jueves Santo
-    "2025-04-18",  # Viernes Santo
-    "2025-05-01",  # Día del Trabajo
-    "2025-05-26",  # Ascensión del Señor (trasladado)
-    "2025-06-16",  # Corpus Christi (trasladado)
-    "2025-06-23",  # Sagrado Corazón (trasladado)
-    "2025-07-07",  # San Pedro y San Pablo (trasladado)
-    "2025-08-07",  # Batalla de Boyacá
-    "2025-08-18",  # Asunción de la Virgen (trasladado)
-    "2025-10-13",  # Día de la Raza (trasladado)
-    "2025-11-03",  # Todos los Santos (trasladado)
-    "2025-11-17",  # Independencia de Cartagena (trasladado)
-    "2025-12-08",  # Inmaculada Concepción
-    "2025-12-25",  # Navidad
-
-    # 2026
-    "2026-01-01",  # Año Nuevo
-    "2026-01-12",  # Reyes Magos (trasladado)
-    "2026-03-23",  # San José (trasladado)
-    "2026-04-02",  # Jueves Santo
-    "2026-04-03",  # Viernes Santo
-    "2026-05-01",  # Día del Trabajo
-    "2026-05-18",  # Ascensión del Señor (trasladado)
-    "2026-06-08",  # Corpus Christi (trasladado)
-    "2026-06-15",  # Sagrado Corazón (trasladado)
-    "2026-06-29",  # San Pedro y San Pablo (trasladado)
-    "2026-07-20",  # Independencia de Colombia
-    "2026-08-07",  # Batalla de Boyacá
-    "2026-08-17",  # Asunción de la Virgen (trasladado)
-    "2026-10-12",  # Día de la Raza
-    "2026-11-02",  # Todos los Santos (trasladado)
-    "2026-11-16",  # Independencia de Cartagena (trasladado)
-    "2026-12-08",  # Inmaculada Concepción
-    "2026-12-25",  # Navidad
+# Los festivos nacionales se calculan por año en festivos_colombia.py
+# (fechas fijas, Pascua y traslados de la Ley Emiliani).
+
+# Formatos de fecha vistos en las exportaciones de Fénix / ENTER
+FORMATOS_FECHA = [
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%d-%b-%Y %H:%M:%S",
 ]
 
-# Convertimos a tipo fecha (datetime64) para que Numpy las use correctamente
-FESTIVOS = np.array(FESTIVOS, dtype='datetime64[D]')
+ALERTA_UMBRAL_DIAS = 2  # Alerta si faltan 2 días o menos
 
-# Convertimos a tipo fecha (datetime64) para que Numpy las use correctamente
-FESTIVOS = np.array(FESTIVOS, dtype='datetime64[D]')
+# Subir este número cuando cambie la lógica de limpieza (invalida el estado incremental)
+VERSION_LIMPIEZA = 1
 
-ALERTA_UMBRAL_DIAS = 2  # Alerta si faltan 2 días o menos
+COLUMNAS_FINALES = [
+    "PEDIDO", "MUNICIPIO", "FECHA_INGRESO", "FECHA_INICIO_ANS",
+    "ZONA", "SECTOR", "DIAS_CUMP", "FECHA_LIMITE",
+    "DIAS_TRANSCURRIDOS", "DIAS_RESTANTES", "ESTADO", "ESTADO_DIGITADO"
+]
 
-DIAS_PACTADOS_CONFIG = {
-    "HV": {"URBANA": 5, "URBANOS": 5, "URBANO": 5, "URBAN": 5, "RURAL": 8, "RURALES": 8},
-    "PUNTOS": {"URBANA": 4, "RURAL": 4},
-    "PREPAGO": {"URBANA": 5, "RURAL": 8},
-}
+# Columnas que dependen de la fecha de corte (se recalculan en cada ejecución)
+COLUMNAS_TEMPORALES = ["DIAS_TRANSCURRIDOS", "DIAS_RESTANTES", "ESTADO"]
+COLUMNAS_ESTATICAS = [c for c in COLUMNAS_FINALES if c not in COLUMNAS_TEMPORALES]
+
+# ------------------------------------------------------------
+# REGLAS DE DÍAS DE CUMPLIMIENTO (DIAS_CUMP)
+# ------------------------------------------------------------
+# Cada regla: dataset, patrón regex sobre ACTIVIDAD y ZONA (None = cualquiera),
+# días pactados y prioridad (gana la regla de menor prioridad que aplique).
+# Si ninguna regla aplica, DIAS_CUMP = 0. Un dataset sin reglas usa las de HV.
+REGLAS_DIAS_CUMP = [
+    {"dataset": "HV", "actividad": None, "zona": r"^(?:URBANA|URBANOS|URBANO|URBAN)$", "dias": 5, "prioridad": 1},
+    {"dataset": "HV", "actividad": None, "zona": r"^(?:RURAL|RURALES)$", "dias": 8, "prioridad": 2},
+
+    {"dataset": "PUNTOS", "actividad": None, "zona": r"^(?:URBANA|RURAL)$", "dias": 4, "prioridad": 1},
+
+    {"dataset": "PREPAGO", "actividad": r"DESINSTALAR|INSTALAR|TRABAJO", "zona": None, "dias": 11, "prioridad": 1},
+    {"dataset": "PREPAGO", "actividad": r"REPLANTEO", "zona": r"URBANA", "dias": 5, "prioridad": 2},
+    {"dataset": "PREPAGO", "actividad": r"REPLANTEO", "zona": r"RURAL", "dias": 8, "prioridad": 3},
+]
 
 # ------------------------------------------------------------
 # FUNCIONES AUXILIARES
@@ -89,86 +87,186 @@ def to_datetime(x):
         return pd.NaT
 
 
-def detectar_columna_ru(df):
-    """Detecta automáticamente la columna R/U o ZONA."""
-    for col in df.columns:
-        col_clean = col.replace(" ", "").replace("/", "").replace("\\", "").upper()
-        if col_clean in ["RU", "R/U", "R∕U", "R_U"]:
-            return col
-    return None
-
-
-def add_business_days_keep_time(dt, n_days):
-    """Suma n días hábiles (lunes-viernes) sin contar festivos."""
-    if pd.isna(dt):
-        return pd.NaT
-    date_part = np.datetime64(dt.date())
-    time_part = dt.time()
-    new_date = np.busday_offset(
-        date_part,
-        n_days,
+def parsear_fechas(serie):
+    """
+    Convierte una columna completa a datetime64.
+    Respeta las fechas que ya vienen como datetime de Excel, prueba FORMATOS_FECHA
+    sobre toda la columna y solo usa to_datetime celda a celda para lo que sobre.
+    Devuelve la serie convertida y el conteo de filas resueltas por cada formato.
+    """
+    serie = pd.Series(serie)
+    conteo = {}
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        conteo["datetime Excel"] = int(serie.notna().sum())
+        conteo["vacías"] = int(serie.isna().sum())
+        return serie, conteo
+
+    resultado = pd.Series(pd.NaT, index=serie.index, dtype="datetime64[ns]")
+    pendiente = serie.notna().to_numpy()
+
+    # 1) Celdas que Excel ya entregó como fecha
+    es_fecha = serie.map(type).isin([datetime, pd.Timestamp]).to_numpy() & pendiente
+    if es_fecha.any():
+        resultado[es_fecha] = pd.to_datetime(serie[es_fecha])
+    conteo["datetime Excel"] = int(es_fecha.sum())
+    pendiente &= ~es_fecha
+
+    # 2) Texto con formatos conocidos (una conversión por formato sobre toda la columna)
+    texto = serie.astype(str).str.strip()
+    for formato in FORMATOS_FECHA:
+        if not pendiente.any():
+            break
+        convertidas = pd.to_datetime(texto[pendiente], format=formato, errors="coerce")
+        ok = convertidas.notna()
+        resultado[convertidas.index[ok]] = convertidas[ok]
+        pendiente[serie.index.get_indexer(convertidas.index[ok])] = False
+        conteo[formato] = int(ok.sum())
+
+    # 3) Respaldo lento solo para las celdas restantes
+    if pendiente.any():
+        respaldo = serie[pendiente].apply(to_datetime)
+        resultado[pendiente] = pd.to_datetime(respaldo, errors="coerce")
+        conteo["respaldo"] = int(respaldo.notna().sum())
+
+    conteo["vacías"] = int(resultado.isna().sum())
+    return resultado, conteo
+
+
+def compilar_reglas(reglas):
+    """Agrupa las reglas por dataset, ordenadas por prioridad y con los patrones compilados."""
+    compiladas = {}
+    for regla in sorted(reglas, key=lambda r: r["prioridad"]):
+        compiladas.setdefault(regla["dataset"].upper(), []).append((
+            re.compile(regla["actividad"]) if regla["actividad"] else None,
+            re.compile(regla["zona"]) if regla["zona"] else None,
+            regla["dias"],
+        ))
+    return compiladas
+
+
+REGLAS_COMPILADAS = compilar_reglas(REGLAS_DIAS_CUMP)
+
+
+def calcular_dias_cump(df, dataset):
+    """Aplica las reglas del dataset con máscaras str.contains (por valor distinto) + np.select."""
+    reglas = REGLAS_COMPILADAS.get(dataset.upper(), REGLAS_COMPILADAS["HV"])
+    columnas = {}
+    for col in ["ACTIVIDAD", "ZONA"]:
+        valores = df[col] if col in df.columns else pd.Series("", index=df.index)
+        codigos, unicos = factorizar(valores)
+        columnas[col] = (codigos, unicos.astype(str).str.upper())
+
+    def coincide(col, patron):
+        # El patrón se evalúa sobre los valores distintos y se expande con los códigos
+        codigos, unicos = columnas[col]
+        return unicos.str.contains(patron).to_numpy(dtype=bool)[codigos]
+
+    condiciones, dias = [], []
+    for patron_act, patron_zona, n in reglas:
+        mascara = np.ones(len(df), dtype=bool)
+        if patron_act is not None:
+            mascara &= coincide("ACTIVIDAD", patron_act)
+        if patron_zona is not None:
+            mascara &= coincide("ZONA", patron_zona)
+        condiciones.append(mascara)
+        dias.append(n)
+
+    return pd.Series(np.select(condiciones, dias, default=0), index=df.index).astype(int)
+
+
+def separar_fecha_hora(fechas):
+    """Separa una serie de fechas en día (datetime64[D]), hora (timedelta64) y máscara de válidas."""
+    fechas = pd.to_datetime(pd.Series(fechas), errors="coerce")
+    validas = fechas.notna().to_numpy()
+    dias = fechas.to_numpy(dtype="datetime64[D]")
+    hora = (fechas - fechas.dt.floor("D")).to_numpy(dtype="timedelta64[ns]")
+    return dias, hora, validas
+
+
+def calendario_para(*fechas):
+    """Calendario hábil (WEEKMASK + festivos) que cubre los años de las fechas dadas."""
+    return calendario_habil(WEEKMASK, *rango_anios(*fechas))
+
+
+def add_business_days_keep_time(fechas, n_days):
+    """Suma n días hábiles (lunes-viernes, sin festivos) a toda la columna, conservando la hora."""
+    fechas = pd.Series(fechas)
+    dias, hora, validas = separar_fecha_hora(fechas)
+    n_days = np.broadcast_to(np.asarray(n_days, dtype="int64"), dias.shape)
+
+    nuevas = np.full(dias.shape, np.datetime64("NaT"), dtype="datetime64[D]")
+    nuevas[validas] = np.busday_offset(
+        dias[validas],
+        n_days[validas],
         roll='forward',
-        weekmask=WEEKMASK,
-        holidays=FESTIVOS
+        busdaycal=calendario_para(fechas)
     )
-    return datetime.combine(pd.to_datetime(str(new_date)).date(), time_part)
+    return pd.Series(nuevas.astype("datetime64[ns]") + hora, index=fechas.index)
 
 
 def business_days_between(start_dt, end_dt):
-    """Cuenta días hábiles (lunes-viernes) sin incluir festivos."""
-    if pd.isna(start_dt) or pd.isna(end_dt):
-        return np.nan
-    start_date = np.datetime64(start_dt.date() + timedelta(days=1))
-    end_date = np.datetime64(end_dt.date())
-    return int(np.busday_count(start_date, end_date, weekmask=WEEKMASK, holidays=FESTIVOS))
+    """Cuenta días hábiles (lunes-viernes) sin incluir festivos, desde cada fecha de la columna hasta end_dt."""
+    start_dt = pd.Series(start_dt)
+    dias, _, validas = separar_fecha_hora(start_dt)
+    fin = np.datetime64(pd.Timestamp(end_dt).date())
+
+    conteo = np.full(dias.shape, np.nan)
+    conteo[validas] = np.busday_count(
+        dias[validas] + np.timedelta64(1, "D"),
+        fin,
+        busdaycal=calendario_para(start_dt, end_dt)
+    )
+    return pd.Series(conteo, index=start_dt.index)
+
+
+def clasificar_estado(df, hoy):
+    """Calcula TIEMPO_RESTANTE (timedelta64), DIAS_RESTANTES y ESTADO sobre toda la columna."""
+    restante = pd.to_datetime(df["FECHA_LIMITE"]) - pd.Timestamp(hoy)
+    sin_fecha = restante.isna().to_numpy()
+    vencido = (restante < pd.Timedelta(0)).to_numpy()
+    dias = restante.dt.days
+
+    df["TIEMPO_RESTANTE"] = restante
+
+    # Texto "N días HH:MM" con la hora de inicio del ANS
+    inicio = pd.to_datetime(df["FECHA_INICIO_ANS"])
+    texto = (
+        dias.astype("Int64").astype(str)
+        + " días "
+        + inicio.dt.hour.astype("Int64").astype(str).str.zfill(2)
+        + ":"
+        + inicio.dt.minute.astype("Int64").astype(str).str.zfill(2)
+    )
+    df["DIAS_RESTANTES"] = np.select(
+        [sin_fecha, vencido | (restante == pd.Timedelta(0)).to_numpy()],
+        ["", "VENCIDO"],
+        default=texto.to_numpy(dtype=object),
+    )
+
+    df["ESTADO"] = np.select(
+        [sin_fecha, vencido, (dias <= ALERTA_UMBRAL_DIAS).to_numpy()],
+        ["SIN FECHA", "VENCIDO", "ALERTA"],
+        default="A TIEMPO",
+    )
+    return df
+
+
+def recalcular_campos_temporales(df, hoy=None):
+    """Recalcula DIAS_TRANSCURRIDOS, DIAS_RESTANTES y ESTADO respecto a `hoy` (por defecto, ahora)."""
+    hoy = hoy or datetime.now()
+    df["DIAS_TRANSCURRIDOS"] = business_days_between(df["FECHA_INICIO_ANS"], hoy)
+    clasificar_estado(df, hoy)
+    return df
 
 
 # ------------------------------------------------------------
 # LIMPIEZA PRINCIPAL
 # ------------------------------------------------------------
-def limpiar_individual(df, dataset):
+def limpiar_individual(df, dataset, hoy=None):
     # ------------------------------------------------------------
-    # LIMPIEZA DE NOMBRES DE COLUMNAS
+    # NOMBRES DE COLUMNAS (mapeo compilado una vez por formato de encabezado)
     # ------------------------------------------------------------
-    df.columns = (
-        df.columns.str.strip()
-        .str.upper()
-        .str.replace(r"[^A-Z0-9_/ ]", "", regex=True)
-        .str.replace("  ", " ")
-    )
-
-    # 🔍 Elimina columnas duplicadas invisibles
-    clean_cols = []
-    final_cols = []
-    for col in df.columns:
-        base = col.strip().upper()
-        if base not in clean_cols:
-            clean_cols.append(base)
-            final_cols.append(col)
-    df = df.loc[:, final_cols]
-
-    # ------------------------------------------------------------
-    # DETECTAR Y RENOMBRAR COLUMNAS CLAVE
-    # ------------------------------------------------------------
-    renombres = {}
-    for c in df.columns:
-        col_clean = c.strip().upper().replace("_", "").replace("-", "").replace(" ", "")
-        if "PEDIDO" in col_clean:
-            renombres[c] = "PEDIDO"
-        elif "MPIO" in col_clean or "MUNICIPIO" in col_clean:
-            renombres[c] = "MUNICIPIO"
-        elif "FECHAINGRESO" in col_clean:
-            renombres[c] = "FECHA_INGRESO"
-        elif "FECHAINICIO" in col_clean and "ANS" in col_clean:
-            renombres[c] = "FECHA_INICIO_ANS"
-        elif "ACTIVIDAD" in col_clean:
-            renombres[c] = "ACTIVIDAD"
-        elif "SECTOR" in col_clean:
-            renombres[c] = "SECTOR"
-        elif col_clean in ["EST", "ESTADO", "STATUS"]:
-            renombres[c] = "ESTADO_DIGITADO"    
-
-    df.rename(columns=renombres, inplace=True)
+    df = aplicar_mapeo(df, dataset)
 
     # ------------------------------------------------------------
     # ASEGURAR COLUMNAS CLAVE
@@ -177,155 +275,46 @@ def limpiar_individual(df, dataset):
         if col not in df.columns:
             df[col] = pd.NA
 
-    # Detectar columna ZONA o R/U
-    col_zona = detectar_columna_ru(df)
-    if col_zona:
-        df.rename(columns={col_zona: "ZONA"}, inplace=True)
-    elif "ZONA" not in df.columns:
+    # La columna R/U ya quedó como ZONA en el mapeo de encabezados
+    if "ZONA" not in df.columns:
         df["ZONA"] = np.nan
 
     if "SECTOR" not in df.columns:
         df["SECTOR"] = np.nan
 
     # ------------------------------------------------------------
-    # NORMALIZAR MUNICIPIO Y ZONA
-    # ------------------------------------------------------------
-    MUNICIPIOS_MAP = {
-        "MED": "MEDELLÍN",
-        "ITA": "ITAGÜÍ",
-        "LA EST": "LA ESTRELLA",
-        "SAB": "SABANETA",
-        "ENV": "ENVIGADO",
-    }
-
-    df["MUNICIPIO"] = (
-        df["MUNICIPIO"]
-        .astype(str)
-        .str.upper()
-        .str.strip()
-        .replace(MUNICIPIOS_MAP)
-    )
-
-    df["ZONA"] = (
-        df["ZONA"]
-        .astype(str)
-        .str.upper()
-        .str.strip()
-        .str.replace("-", "")
-        .str.replace("_", "")
-    )
+    # NORMALIZAR MUNICIPIO Y ZONA (reglas en normalizacion.py)
     # ------------------------------------------------------------
-# 🔹 LIMPIEZA DE ZONA (URBANA / RURAL / SIN DATO)
-# ------------------------------------------------------------
-    reemplazos_zona = {
-        "URBAN": "URBANA",
-        "URBANO": "URBANA",
-        "URBANA": "URBANA",
-        "RURAL": "RURAL",
-        "RURALES": "RURAL",
-        "SIN DATO": "SIN DATO",
-        "NAN": "SIN DATO",
-        "": "SIN DATO",
-        "NONE": "SIN DATO"
-    }
-
-    df["ZONA"] = df["ZONA"].replace(reemplazos_zona)
+    df["MUNICIPIO"] = normalizar_columna(df["MUNICIPIO"], "MUNICIPIO_LIMPIEZA")
+    df["ZONA"] = normalizar_columna(df["ZONA"], "ZONA")
     print(f"📍 Limpieza aplicada a columna ZONA en dataset {dataset.upper()}.")
-    print("Valores únicos después de limpieza:", df["ZONA"].dropna().unique())
+    print("Valores únicos después de limpieza:", np.asarray(df["ZONA"].dropna().unique()))
 
 
     # Convertir fechas
-    df["FECHA_INGRESO"] = df["FECHA_INGRESO"].apply(to_datetime)
-    df["FECHA_INICIO_ANS"] = df["FECHA_INICIO_ANS"].apply(to_datetime)
+    for col in ["FECHA_INGRESO", "FECHA_INICIO_ANS"]:
+        df[col], conteo = parsear_fechas(df[col])
+        detalle = ", ".join(f"{formato}: {n}" for formato, n in conteo.items() if n)
+        print(f"📅 {col} → {detalle}")
 
     # ------------------------------------------------------------
     # DÍAS PACTADOS POR ZONA O ACTIVIDAD
     # ------------------------------------------------------------
-    if dataset.upper() == "PREPAGO":
-        def dias_cumplimiento(row):
-            act = str(row.get("ACTIVIDAD", "")).upper()
-            zona = str(row.get("ZONA", "")).upper()
-            if any(x in act for x in ["DESINSTALAR", "INSTALAR", "TRABAJO"]):
-                return 11
-            elif "REPLANTEO" in act and "URBANA" in zona:
-                return 5
-            elif "REPLANTEO" in act and "RURAL" in zona:
-                return 8
-            else:
-                return 0
-
-        df["DIAS_CUMP"] = df.apply(dias_cumplimiento, axis=1)
-
-    else:
-        dias_cfg = DIAS_PACTADOS_CONFIG.get(dataset.upper(), DIAS_PACTADOS_CONFIG["HV"])
-        df["DIAS_CUMP"] = df["ZONA"].map(dias_cfg).fillna(0).astype(int)
+    df["DIAS_CUMP"] = calcular_dias_cump(df, dataset)
 
     # ------------------------------------------------------------
     # CÁLCULOS EXACTOS
     # ------------------------------------------------------------
-    hoy = datetime.now()
-
-    # Fecha límite considerando festivos
-    df["FECHA_LIMITE"] = df.apply(
-        lambda r: add_business_days_keep_time(r["FECHA_INICIO_ANS"], r["DIAS_CUMP"]),
-        axis=1
-    )
-
-    # Días transcurridos hábiles (sin festivos)
-    df["DIAS_TRANSCURRIDOS"] = df.apply(
-        lambda r: business_days_between(r["FECHA_INICIO_ANS"], hoy)
-        if pd.notna(r["FECHA_INICIO_ANS"]) else np.nan,
-        axis=1,
-    )
+    # Fecha límite considerando festivos (un solo busday_offset sobre toda la columna)
+    df["FECHA_LIMITE"] = add_business_days_keep_time(df["FECHA_INICIO_ANS"], df["DIAS_CUMP"])
 
-    # Tiempo restante y estado
-    def tiempo_restante(row):
-        if pd.isna(row["FECHA_LIMITE"]):
-            return ""
-        if row["FECHA_LIMITE"] < hoy:
-            return "VENCIDO"
-        return row["FECHA_LIMITE"] - hoy
-
-    df["TIEMPO_RESTANTE"] = df.apply(tiempo_restante, axis=1)
-
-    def formatear_dias_restantes(row):
-        valor = row["TIEMPO_RESTANTE"]
-        fecha_inicio = row["FECHA_INICIO_ANS"]
-        if isinstance(valor, str) and valor == "VENCIDO":
-            return "VENCIDO"
-        if isinstance(valor, timedelta):
-            if valor.total_seconds() <= 0:
-                return "VENCIDO"
-            dias = int(valor.days)
-            hora_inicio = fecha_inicio.time()
-            return f"{dias} días {hora_inicio.hour:02d}:{hora_inicio.minute:02d}"
-        return ""
-
-    df["DIAS_RESTANTES"] = df.apply(formatear_dias_restantes, axis=1)
-
-    def calcular_estado(row):
-        valor = row["TIEMPO_RESTANTE"]
-        if isinstance(valor, str) and valor == "VENCIDO":
-            return "VENCIDO"
-        if isinstance(valor, timedelta):
-            dias_rest = valor.days
-            if dias_rest <= ALERTA_UMBRAL_DIAS:
-                return "ALERTA"
-            return "A TIEMPO"
-        return "SIN FECHA"
-
-    df["ESTADO"] = df.apply(calcular_estado, axis=1)
+    # Días transcurridos, días restantes y estado respecto a hoy (pasada vectorizada)
+    recalcular_campos_temporales(df, hoy)
 
     # ------------------------------------------------------------
     # SALIDA FINAL
     # ------------------------------------------------------------
-    columnas_finales = [
-        "PEDIDO", "MUNICIPIO", "FECHA_INGRESO", "FECHA_INICIO_ANS",
-        "ZONA", "SECTOR", "DIAS_CUMP", "FECHA_LIMITE",
-        "DIAS_TRANSCURRIDOS", "DIAS_RESTANTES", "ESTADO", "ESTADO_DIGITADO"
-    ]
-
-    df_final = df[columnas_finales].copy()
+    df_final = categorizar(df[COLUMNAS_FINALES].copy())
 
     print("\n🧩 Vista previa:")
     print(df_final.head(10))
@@ -334,37 +323,122 @@ def limpiar_individual(df, dataset):
 
 
 # ------------------------------------------------------------
-# EJECUCIÓN Y EXPORTACIÓN
+# LIMPIEZA INCREMENTAL
 # ------------------------------------------------------------
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--input", required=True)
-    parser.add_argument("--dataset", required=True, choices=["HV", "PUNTOS", "PREPAGO"])
-    parser.add_argument("--output", required=True)
-    args = parser.parse_args()
+def firma_limpieza(df, dataset):
+    """
+    Todo lo que, si cambia, obliga a recalcular el dataset completo: además de
+    las reglas de este módulo, las de texto (MUNICIPIO, ZONA) y de encabezados,
+    de las que salen las columnas estáticas guardadas.
+    """
+    return firma(
+        VERSION_LIMPIEZA, dataset.upper(), list(map(str, df.columns)),
+        REGLAS_DIAS_CUMP, FORMATOS_FECHA, WEEKMASK, COLUMNAS_ESTATICAS,
+        PERFILES, PLEGADO, FIRMA_REGLAS,
+    )
 
-    src = Path(args.input)
-    if not src.exists():
-        raise SystemExit(f"No se encontró el archivo: {src}")
 
-    print(f"\n📥 Leyendo archivo: {src}")
-    df = pd.read_excel(src)
+def clave_de_salida(salida):
+    """Clave de estado a partir del archivo de salida: data_clean/FENIX_limpio.xlsx → FENIX."""
+    clave = Path(salida).stem.upper()
+    return clave[:-len("_LIMPIO")] if clave.endswith("_LIMPIO") else clave
 
-    print("\n🧹 Ejecutando limpieza y cálculos...")
-    limpio = limpiar_individual(df, args.dataset)
 
-    out = Path(args.output)
+def limpiar_incremental(df, dataset, hoy=None, estado_dir=None, clave_estado=None):
+    """
+    Igual que limpiar_individual, pero solo limpia las filas nuevas o modificadas
+    desde la última ejecución; el resto sale del estado guardado. Los campos que
+    dependen de `hoy` se recalculan para todas las filas. El estado se guarda
+    con `clave_estado` (por defecto, el nombre del dataset).
+    """
+    hoy = hoy or datetime.now()
+    clave = (clave_estado or dataset).upper()
+    opciones = {"estado_dir": estado_dir} if estado_dir else {}
+    firma_actual = firma_limpieza(df, dataset)
+    hashes = hash_filas(df).to_numpy()
+
+    estado = cargar_estado(clave, firma_actual, **opciones)
+    if estado is None:
+        estado = pd.DataFrame(columns=COLUMNAS_ESTATICAS, index=pd.Index([], dtype="uint64"))
+
+    conocidas = pd.Index(hashes).isin(estado.index)
+    partes = [estado[estado.index.isin(hashes)]]
+    if not conocidas.all():
+        frescas = limpiar_individual(df.loc[~conocidas].copy(), dataset, hoy)[COLUMNAS_ESTATICAS]
+        frescas.index = hashes[~conocidas]
+        partes.append(frescas)
+
+    vigente = pd.concat([p for p in partes if len(p)]) if any(len(p) for p in partes) else estado
+    vigente = vigente[~vigente.index.duplicated()]
+    retiradas = int((~estado.index.isin(hashes)).sum())
+    print(f"♻️ {clave}: {int(conocidas.sum())} filas sin cambios, "
+          f"{int((~conocidas).sum())} nuevas o modificadas, {retiradas} retiradas.")
+
+    guardar_estado(clave, vigente, firma_actual, **opciones)
+
+    limpio = vigente.loc[hashes].reset_index(drop=True)
+    recalcular_campos_temporales(limpio, hoy)
+    return categorizar(limpio[COLUMNAS_FINALES].copy())
+
+
+# ------------------------------------------------------------
+# FECHA DE CORTE (sin volver a limpiar)
+# ------------------------------------------------------------
+def calcular_al_corte(estatico, fecha_corte=None):
+    """
+    Toma un resultado estático (COLUMNAS_ESTATICAS) y devuelve el resultado completo
+    con DIAS_TRANSCURRIDOS, DIAS_RESTANTES y ESTADO calculados a `fecha_corte`.
+    Sirve para refrescar el estado durante el día o reconstruir cortes históricos.
+    """
+    limpio = estatico[COLUMNAS_ESTATICAS].copy()
+    recalcular_campos_temporales(limpio, fecha_corte)
+    return categorizar(limpio[COLUMNAS_FINALES].copy())
+
+
+def corte_guardado(dataset, fecha_corte=None, clave_estado=None, entrada=None):
+    """
+    Aplica calcular_al_corte al último resultado estático guardado con `clave_estado`
+    (por defecto, el dataset). Con `entrada`, el resultado guardado debe haber salido
+    de ese archivo; si no (o si no hay), se limpia `entrada` completo.
+    """
+    clave = (clave_estado or dataset).upper()
+    estatico = cargar_estatico(clave, origen=entrada)
+    if estatico is None:
+        if entrada is None:
+            raise SystemExit(f"❌ No hay resultado guardado de {clave}: ejecuta primero la limpieza.")
+        print(f"🔁 {clave}: se limpia completo {Path(entrada).name}.")
+        return leer_y_limpiar(entrada, dataset, hoy=fecha_corte, clave_estado=clave)
+    return calcular_al_corte(estatico, fecha_corte)
+
+
+def leer_fecha_corte(texto):
+    """Convierte el argumento --fecha-corte ('2025-10-15' o '2025-10-15 14:30') a datetime."""
+    if not texto:
+        return None
+    try:
+        return pd.Timestamp(texto).to_pydatetime()
+    except ValueError:
+        raise SystemExit(f"❌ Fecha de corte inválida: {texto} (usa AAAA-MM-DD o 'AAAA-MM-DD HH:MM').")
+
+
+# ------------------------------------------------------------
+# EJECUCIÓN Y EXPORTACIÓN
+# ------------------------------------------------------------
+def exportar_limpio(limpio, out):
+    """Exporta DATA_CLEAN + RESUMEN y, si hay pedidos repetidos, el archivo Duplicados_*."""
+    out = Path(out)
     out.parent.mkdir(parents=True, exist_ok=True)
 
     # ------------------------------------------------------------
     # ⚙️ Diagnóstico opcional de duplicados
     # ------------------------------------------------------------
-    duplicados = limpio[limpio.duplicated(subset=["PEDIDO"], keep=False)]
-    if not duplicados.empty:
-        print(f"\n⚠️ Se detectaron {len(duplicados)} pedidos duplicados. Se marcarán en una hoja aparte.")
-        duplicados["OBSERVACION"] = "DUPLICADO DETECTADO"
+    repetidos = filas_repetidas(limpio, entradas_indice(limpio, out.stem))
+    if len(repetidos):
+        print(f"\n⚠️ Se detectaron {len(repetidos)} pedidos duplicados. Se marcarán en una hoja aparte.")
+        filas_duplicadas = limpio.iloc[repetidos].copy()
+        filas_duplicadas["OBSERVACION"] = "DUPLICADO DETECTADO"
         out_duplicados = out.parent / f"Duplicados_{out.stem}.xlsx"
-        duplicados.to_excel(out_duplicados, index=False)
+        escribir_excel(out_duplicados, filas_duplicadas)
         print(f"📄 Archivo de duplicados generado: {out_duplicados}")
     else:
         print("\n✅ No se encontraron duplicados en la columna PEDIDO.")
@@ -372,15 +446,78 @@ def main():
     # ------------------------------------------------------------
     # 📤 EXPORTACIÓN FINAL
     # ------------------------------------------------------------
-    with pd.ExcelWriter(out, engine="openpyxl") as writer:
-        limpio.to_excel(writer, index=False, sheet_name="DATA_CLEAN")
-        resumen = limpio["ESTADO"].value_counts().reset_index()
-        resumen.columns = ["ESTADO", "CANTIDAD"]
-        resumen.to_excel(writer, index=False, sheet_name="RESUMEN")
+    resumen = limpio["ESTADO"].value_counts().reset_index()
+    resumen.columns = ["ESTADO", "CANTIDAD"]
+    escribir_excel(out, {"DATA_CLEAN": limpio, "RESUMEN": resumen})
 
     print(f"\n✅ Limpieza completada con éxito: {out}")
     print("📊 Hoja 'RESUMEN' generada con totales por estado.")
 
 
+def leer_y_limpiar(entrada, dataset, usar_cache=True, filas_por_bloque=FILAS_POR_BLOQUE, incremental=False,
+                   hoy=None, clave_estado=None):
+    """
+    Lee un archivo de programación (.xlsx) o un pendientes_*.csv de Fénix
+    y devuelve el DataFrame limpio (sin exportar). Con incremental=True solo
+    se limpian las filas que cambiaron desde la última ejecución. El resultado
+    estático queda guardado para calcular_al_corte / corte_guardado, y el
+    índice de pedidos del dataset se actualiza y se cruza con los de los demás.
+
+    `dataset` elige las reglas de limpieza; `clave_estado` (por defecto, el
+    mismo dataset) es el nombre con el que se guarda el estado. Una fuente
+    distinta del archivo de data_raw/ (p. ej. Fénix con reglas de HV) debe
+    usar su propia clave para no reemplazar el estado de HV.
+    """
+    clave = (clave_estado or dataset).upper()
+    src = Path(entrada)
+    if not src.exists():
+        raise SystemExit(f"No se encontró el archivo: {src}")
+
+    print(f"\n📥 Leyendo archivo: {src}")
+    if src.suffix.lower() == ".csv":
+        df = leer_pendientes(src, filas_por_bloque=filas_por_bloque)
+    else:
+        df = leer_excel_cacheado(src) if usar_cache else pd.read_excel(src)
+
+    print("\n🧹 Ejecutando limpieza y cálculos...")
+    if incremental:
+        limpio = limpiar_incremental(df, dataset, hoy, clave_estado=clave)
+    else:
+        limpio = limpiar_individual(df, dataset, hoy)
+    guardar_estatico(clave, limpio[COLUMNAS_ESTATICAS], origen=src)
+
+    entradas = entradas_indice(limpio, clave)
+    revisar_dataset(clave, entradas, anteriores=cargar_indice(clave))
+    guardar_indice(clave, entradas)
+    return limpio
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input")
+    parser.add_argument("--dataset", required=True, choices=["HV", "PUNTOS", "PREPAGO"])
+    parser.add_argument("--output", required=True,
+                        help="Archivo limpio; su nombre (HV_limpio.xlsx → HV) es la clave del estado guardado.")
+    parser.add_argument("--sin-cache", action="store_true", help="Lee el Excel sin usar la cache de lecturas.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Solo limpia los pedidos nuevos o modificados desde la última ejecución.")
+    parser.add_argument("--fecha-corte", default=None,
+                        help="Fecha/hora de corte para ESTADO (por defecto, ahora). Ej: '2025-10-15 14:30'.")
+    parser.add_argument("--solo-corte", action="store_true",
+                        help="No lee --input: recalcula ESTADO sobre el último resultado limpio guardado.")
+    args = parser.parse_args()
+
+    fecha_corte = leer_fecha_corte(args.fecha_corte)
+    clave = clave_de_salida(args.output)
+    if args.solo_corte:
+        limpio = corte_guardado(args.dataset, fecha_corte, clave_estado=clave, entrada=args.input)
+    elif args.input:
+        limpio = leer_y_limpiar(args.input, args.dataset, usar_cache=not args.sin_cache,
+                                incremental=args.incremental, hoy=fecha_corte, clave_estado=clave)
+    else:
+        parser.error("--input es obligatorio salvo con --solo-corte")
+    exportar_limpio(limpio, args.output)
+
+
 if __name__ == "__main__":
     main()
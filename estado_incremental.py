@@ -0,0 +1,141 @@
+"""
+------------------------------------------------------------
+ESTADO INCREMENTAL – Último resultado limpio por dataset
+------------------------------------------------------------
+Autor: Héctor + IA (2025)
+------------------------------------------------------------
+Guarda, por dataset, las columnas estáticas del último resultado limpio
+(todo lo que no depende de la fecha de corte) junto con un hash de la
+fila de entrada que lo produjo. En la siguiente ejecución solo se
+limpian las filas cuyo hash no está guardado (pedidos nuevos o
+modificados). El estado se descarta si cambia la firma de la limpieza
+(reglas, formatos, encabezados o versión).
+
+También guarda el último resultado estático completo de cada dataset
+(en el orden de la entrada), para recalcular ESTADO a otra fecha de
+corte sin volver a leer ni limpiar los archivos de entrada, y el índice
+de pedidos del dataset (ver indice_pedidos.py).
+
+Los archivos se nombran con la clave de estado: el nombre del dataset
+para los archivos de data_raw/ (HV, PUNTOS, PREPAGO) y el de la salida
+para otras fuentes limpiadas con esas reglas (FENIX_limpio.xlsx → FENIX).
+El resultado estático recuerda el archivo de entrada que lo produjo, para
+no usarlo en lugar de otra fuente.
+"""
+
+import hashlib
+from pathlib import Path
+
+import pandas as pd
+
+from cache_excel import escribir_atomico
+
+# ------------------------------------------------------------
+# CONFIGURACIÓN
+# ------------------------------------------------------------
+ESTADO_DIR = Path(".estado_ans")
+
+
+# ------------------------------------------------------------
+# FUNCIONES
+# ------------------------------------------------------------
+def hash_filas(df):
+    """Hash de 64 bits del contenido de cada fila (incluye PEDIDO), como Series alineada con df."""
+    return pd.util.hash_pandas_object(df, index=False)
+
+
+def firma(*partes):
+    """Huella estable de la configuración que produjo el estado."""
+    return hashlib.sha1(repr(partes).encode("utf-8")).hexdigest()
+
+
+def ruta_origen(entrada):
+    """Ruta absoluta del archivo de entrada, como se guarda junto al resultado estático."""
+    return str(Path(entrada).resolve())
+
+
+def _ruta_estado(dataset, estado_dir):
+    return Path(estado_dir) / f"{dataset.upper()}.pkl"
+
+
+def _ruta_estatico(dataset, estado_dir):
+    return Path(estado_dir) / f"{dataset.upper()}_estatico.pkl"
+
+
+def _ruta_indice(dataset, estado_dir):
+    return Path(estado_dir) / f"{dataset.upper()}_pedidos.pkl"
+
+
+def _guardar_atomico(objeto, ruta):
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    return escribir_atomico(ruta, lambda tmp: pd.to_pickle(objeto, tmp))
+
+
+def cargar_estado(dataset, firma_actual, estado_dir=ESTADO_DIR):
+    """
+    Devuelve el DataFrame guardado (índice = hash de la fila de entrada) o None
+    si no existe o si se generó con otra firma.
+    """
+    ruta = _ruta_estado(dataset, estado_dir)
+    if not ruta.exists():
+        return None
+    guardado = pd.read_pickle(ruta)
+    if guardado.get("firma") != firma_actual:
+        print(f"♻️ Estado de {dataset.upper()} generado con otra configuración: se recalcula completo.")
+        return None
+    return guardado["estado"]
+
+
+def guardar_estado(dataset, estado, firma_actual, estado_dir=ESTADO_DIR):
+    """Guarda el estado de forma atómica (temporal + os.replace)."""
+    return _guardar_atomico({"firma": firma_actual, "estado": estado}, _ruta_estado(dataset, estado_dir))
+
+
+def guardar_estatico(dataset, estatico, origen=None, estado_dir=ESTADO_DIR):
+    """
+    Guarda el último resultado estático del dataset (columnas que no dependen de la
+    fecha de corte) junto con el archivo de entrada del que salió.
+    """
+    origen = ruta_origen(origen) if origen is not None else None
+    return _guardar_atomico({"origen": origen, "estatico": estatico}, _ruta_estatico(dataset, estado_dir))
+
+
+def cargar_estatico(dataset, origen=None, estado_dir=ESTADO_DIR):
+    """
+    Devuelve el último resultado estático guardado del dataset, o None si nunca se
+    limpió o si se pide un `origen` y el guardado salió de otro archivo.
+    """
+    ruta = _ruta_estatico(dataset, estado_dir)
+    if not ruta.exists():
+        return None
+    guardado = pd.read_pickle(ruta)
+    if isinstance(guardado, pd.DataFrame):  # formato anterior, sin origen
+        guardado = {"origen": None, "estatico": guardado}
+    if origen is not None and guardado["origen"] != ruta_origen(origen):
+        print(f"♻️ El resultado guardado de {dataset.upper()} salió de "
+              f"{guardado['origen'] or 'un archivo desconocido'}, no de {origen}.")
+        return None
+    return guardado["estatico"]
+
+
+def guardar_indice(dataset, indice, estado_dir=ESTADO_DIR):
+    """Guarda el índice de pedidos del dataset (clave → dataset, fila, FECHA_INICIO_ANS)."""
+    return _guardar_atomico(indice, _ruta_indice(dataset, estado_dir))
+
+
+def cargar_indice(dataset, estado_dir=ESTADO_DIR):
+    """Devuelve el índice de pedidos guardado del dataset, o None si no existe."""
+    ruta = _ruta_indice(dataset, estado_dir)
+    return pd.read_pickle(ruta) if ruta.exists() else None
+
+
+def datasets_con_indice(estado_dir=ESTADO_DIR):
+    """Nombres de los datasets que tienen índice de pedidos guardado."""
+    return sorted(r.name[:-len("_pedidos.pkl")] for r in Path(estado_dir).glob("*_pedidos.pkl"))
+
+
+def borrar_estado(dataset, estado_dir=ESTADO_DIR):
+    """Elimina el estado guardado del dataset (la próxima ejecución recalcula todo)."""
+    _ruta_estado(dataset, estado_dir).unlink(missing_ok=True)
+    _ruta_estatico(dataset, estado_dir).unlink(missing_ok=True)
+    _ruta_indice(dataset, estado_dir).unlink(missing_ok=True)
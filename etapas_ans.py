@@ -0,0 +1,182 @@
+"""
+------------------------------------------------------------
+ETAPAS ANS – Ejecución en el mismo proceso para el panel de control
+------------------------------------------------------------
+Autor: Héctor + IA (2025)
+------------------------------------------------------------
+Cada botón del panel corresponde a una etapa (HV, PUNTOS, PREPAGO, MERGE,
+CONTROL, TODO). En lugar de abrir un intérprete nuevo por clic, las etapas
+corren en hilos del mismo proceso (ver planificador_ans.py), con pandas y
+los módulos del proyecto importados una sola vez al arrancar el panel.
+TODO (limpieza en paralelo + MERGE) sigue en un proceso aparte porque ya
+reparte el trabajo en varios procesos.
+
+Lo que las etapas imprimen con print() se envía, línea por línea, al
+logger "ans"; el panel agrega su propio logging.Handler para mostrarlo.
+Cada hilo tiene su propio destino de sys.stdout, así dos etapas al mismo
+tiempo no mezclan su salida.
+"""
+
+import io
+import logging
+import subprocess
+import sys
+import threading
+from contextlib import contextmanager
+
+# ------------------------------------------------------------
+# CONFIGURACIÓN
+# ------------------------------------------------------------
+LOGGER = logging.getLogger("ans")
+LOGGER.setLevel(logging.INFO)
+
+NOMBRES_ETAPAS = {
+    "HV": "HABITACIÓN VIVIENDAS",
+    "PUNTOS": "PUNTOS DE CONEXIÓN",
+    "PREPAGO": "PREPAGO",
+    "MERGE": "MERGE",
+    "CONTROL": "CONTROL DE VACÍOS",
+    "TODO": "LIMPIEZA EN PARALELO + MERGE",
+}
+
+
+# ------------------------------------------------------------
+# SALIDA DE CONSOLA → LOGGING
+# ------------------------------------------------------------
+class SalidaLog(io.TextIOBase):
+    """Archivo de texto que reenvía cada línea completa al logger (para redirect_stdout)."""
+
+    def __init__(self, logger=LOGGER, nivel=logging.INFO, prefijo=""):
+        self.logger = logger
+        self.nivel = nivel
+        self.prefijo = prefijo
+        self._pendiente = ""
+
+    def writable(self):
+        return True
+
+    def write(self, texto):
+        lineas = (self._pendiente + texto).split("\n")
+        self._pendiente = lineas.pop()
+        for linea in lineas:
+            self.logger.log(self.nivel, self.prefijo + linea)
+        return len(texto)
+
+    def flush(self):
+        if self._pendiente:
+            self.logger.log(self.nivel, self.prefijo + self._pendiente)
+            self._pendiente = ""
+
+
+class SalidaPorHilo(io.TextIOBase):
+    """sys.stdout que envía lo escrito por cada hilo a su propio destino (o a la salida original)."""
+
+    def __init__(self, original):
+        self.original = original
+        self._local = threading.local()
+
+    def writable(self):
+        return True
+
+    def _destino(self):
+        return getattr(self._local, "destino", None) or self.original
+
+    def write(self, texto):
+        return self._destino().write(texto)
+
+    def flush(self):
+        self._destino().flush()
+
+    @contextmanager
+    def redirigir(self, destino):
+        self._local.destino = destino
+        try:
+            yield destino
+        finally:
+            self._local.destino = None
+
+
+_INSTALAR = threading.Lock()
+
+
+def salida_por_hilo():
+    """Instala (una sola vez) SalidaPorHilo como sys.stdout y la devuelve."""
+    with _INSTALAR:
+        if not isinstance(sys.stdout, SalidaPorHilo):
+            sys.stdout = SalidaPorHilo(sys.stdout)
+        return sys.stdout
+
+
+# ------------------------------------------------------------
+# ETAPAS
+# ------------------------------------------------------------
+def limpiar_dataset(dataset):
+    """Lo mismo que escenario1_individual.py --input ... --dataset X --output data_clean/X_limpio.xlsx."""
+    import escenario1_individual as escenario1
+    from pipeline_ans import DATASETS
+
+    rutas = DATASETS[dataset]
+    limpio = escenario1.leer_y_limpiar(rutas["entrada"], dataset)
+    escenario1.exportar_limpio(limpio, rutas["salida"])
+
+
+def generar_merge(gui=True):
+    """Lo mismo que merge_escenario2.py --gui (lee los *_limpio.xlsx de data_clean)."""
+    import merge_escenario2 as merge
+
+    if gui:
+        merge.aviso_inicial()
+    merge.ejecutar_merge(merge.cargar_limpios(merge.archivos), gui=gui)
+
+
+def control_vacios(gui=True):
+    """Lo mismo que diagnostico_control.py."""
+    import diagnostico_control
+
+    diagnostico_control.controlar_vacios(gui=gui)
+
+
+def pipeline_completo():
+    """python pipeline_ans.py --paralelo --gui en un proceso aparte, con su salida en el log."""
+    proceso = subprocess.Popen(
+        [sys.executable, "-X", "utf8", "pipeline_ans.py", "--paralelo", "--gui"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        encoding="utf-8",
+    )
+    for linea in proceso.stdout:
+        print(linea, end="")
+    if proceso.wait() != 0:
+        raise SystemExit(f"❌ pipeline_ans.py terminó con código {proceso.returncode}.")
+
+
+ETAPAS = {
+    "HV": lambda: limpiar_dataset("HV"),
+    "PUNTOS": lambda: limpiar_dataset("PUNTOS"),
+    "PREPAGO": lambda: limpiar_dataset("PREPAGO"),
+    "MERGE": generar_merge,
+    "CONTROL": control_vacios,
+    "TODO": pipeline_completo,
+}
+
+
+def ejecutar_etapa(etapa, logger=LOGGER, prefijo=""):
+    """
+    Ejecuta la etapa con la salida de consola de este hilo enviada al logger.
+    Devuelve None si terminó bien o el texto del error.
+    """
+    salida = SalidaLog(logger, prefijo=prefijo)
+    try:
+        with salida_por_hilo().redirigir(salida):
+            ETAPAS[etapa]()
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            return str(e.code)
+    except Exception as e:
+        logger.exception(f"Error en {etapa}")
+        return f"{type(e).__name__}: {e}"
+    finally:
+        salida.flush()
+    return None
@@ -0,0 +1,188 @@
+"""
+------------------------------------------------------------
+EXPORTAR EXCEL – Capa única de escritura de archivos .xlsx
+------------------------------------------------------------
+Autor: Héctor + IA (2025)
+------------------------------------------------------------
+Todas las salidas (DATA_CLEAN, MERGE_ANS_FINAL, *_filtrado, Duplicados_*,
+Pedidos_incompletos) pasan por escribir_excel(). Para hojas grandes se usa
+un modo streaming de memoria constante:
+  • xlsxwriter con constant_memory (si está instalado)
+  • openpyxl en modo write_only (siempre disponible)
+Los nombres de hoja y el orden de columnas son los mismos en todos los
+modos, así el modelo de Power BI no cambia. El libro se escribe en un
+temporal de la misma carpeta y se renombra al final: quien lo lea (Power
+BI, el MERGE) nunca ve un archivo a medias.
+
+escribir_particiones() separa un DataFrame por columna (un groupby) y
+escribe cada parte en su propio libro, en paralelo y saltando las partes
+cuyo contenido no cambió desde la última escritura.
+"""
+
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from cache_excel import CACHE_DIR, escribir_atomico
+
+# ------------------------------------------------------------
+# CONFIGURACIÓN
+# ------------------------------------------------------------
+FILAS_MODO_STREAMING = 20_000  # A partir de este tamaño de hoja se escribe en streaming
+FILAS_POR_BLOQUE = 5_000       # Filas convertidas a la vez en el modo streaming
+FORMATO_FECHA = "yyyy-mm-dd hh:mm:ss"
+REGISTRO_PARTICIONES = CACHE_DIR / "particiones.json"  # hash del contenido de cada *_filtrado.xlsx
+
+
+# ------------------------------------------------------------
+# FUNCIONES AUXILIARES
+# ------------------------------------------------------------
+def _filas(df):
+    """Recorre el DataFrame por bloques devolviendo filas de valores Python (vacíos → None)."""
+    for inicio in range(0, len(df), FILAS_POR_BLOQUE):
+        bloque = df.iloc[inicio:inicio + FILAS_POR_BLOQUE].astype(object)
+        bloque = bloque.where(bloque.notna(), None)
+        yield from bloque.itertuples(index=False, name=None)
+
+
+def _xlsxwriter_disponible():
+    try:
+        import xlsxwriter  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# ------------------------------------------------------------
+# ESCRITORES
+# ------------------------------------------------------------
+def _escribir_openpyxl(ruta, hojas):
+    """Escritura estándar de pandas (libro completo en memoria)."""
+    with pd.ExcelWriter(ruta, engine="openpyxl") as writer:
+        for nombre, df in hojas.items():
+            df.to_excel(writer, sheet_name=nombre, index=False)
+
+
+def _escribir_openpyxl_streaming(ruta, hojas):
+    """openpyxl write_only: cada fila se serializa al agregarla."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for nombre, df in hojas.items():
+        ws = wb.create_sheet(title=nombre)
+        ws.append([str(c) for c in df.columns])
+        for fila in _filas(df):
+            ws.append(fila)
+    wb.save(ruta)
+
+
+def _escribir_xlsxwriter_streaming(ruta, hojas):
+    """xlsxwriter con constant_memory: solo mantiene en memoria la fila actual."""
+    import xlsxwriter
+    from openpyxl.utils.datetime import to_excel
+
+    wb = xlsxwriter.Workbook(str(ruta), {"constant_memory": True})
+    formato_fecha = wb.add_format({"num_format": FORMATO_FECHA})
+    for nombre, df in hojas.items():
+        ws = wb.add_worksheet(nombre)
+        ws.write_row(0, 0, [str(c) for c in df.columns])
+        for i, fila in enumerate(_filas(df), start=1):
+            ws.write_row(i, 0, fila)
+            # Fechas con el mismo número de serie que openpyxl (incluye el centinela 1900-01-01)
+            for j, valor in enumerate(fila):
+                if isinstance(valor, datetime):
+                    ws.write_number(i, j, to_excel(valor), formato_fecha)
+    wb.close()
+
+
+ESCRITORES = {
+    "openpyxl": _escribir_openpyxl,
+    "openpyxl_streaming": _escribir_openpyxl_streaming,
+    "xlsxwriter_streaming": _escribir_xlsxwriter_streaming,
+}
+
+
+def elegir_modo(hojas, modo="auto"):
+    """Resuelve el modo de escritura: 'auto' usa streaming solo si alguna hoja es grande."""
+    if modo == "streaming" or (modo == "auto" and any(len(df) >= FILAS_MODO_STREAMING for df in hojas.values())):
+        return "xlsxwriter_streaming" if _xlsxwriter_disponible() else "openpyxl_streaming"
+    if modo == "auto":
+        return "openpyxl"
+    if modo not in ESCRITORES:
+        raise ValueError(f"Modo de escritura desconocido: {modo}. Opciones: auto, streaming, {', '.join(ESCRITORES)}")
+    return modo
+
+
+# ------------------------------------------------------------
+# PUNTO DE ENTRADA
+# ------------------------------------------------------------
+def escribir_excel(ruta, hojas, modo="auto"):
+    """
+    Escribe un .xlsx con una hoja por cada entrada de `hojas` ({nombre_hoja: DataFrame}),
+    en el mismo orden y sin índice. Un DataFrame suelto se escribe en la hoja 'Sheet1'.
+    """
+    if isinstance(hojas, pd.DataFrame):
+        hojas = {"Sheet1": hojas}
+    escritor = ESCRITORES[elegir_modo(hojas, modo)]
+    return escribir_atomico(ruta, lambda tmp: escritor(tmp, hojas), conservar_extension=True)
+
+
+# ------------------------------------------------------------
+# PARTICIONES (un libro por valor de columna)
+# ------------------------------------------------------------
+def hash_contenido(df):
+    """Huella del contenido (columnas, tipos y valores) de un DataFrame, sin el índice."""
+    h = hashlib.sha1(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _huella_archivo(ruta):
+    estado = ruta.stat()
+    return {"tamano": estado.st_size, "mtime_ns": estado.st_mtime_ns}
+
+
+def escribir_particiones(df, columna, ruta_de, registro=REGISTRO_PARTICIONES, max_workers=4, modo="auto"):
+    """
+    Separa df por `columna` en una sola pasada (groupby) y escribe cada parte
+    en ruta_de(valor) desde un pool de hilos. Una parte se salta si su hash de
+    contenido es el registrado y el archivo sigue igual (tamaño y fecha).
+    Devuelve {ruta: "escrito" | "sin cambios" | "error: ..."}.
+    """
+    registro = Path(registro)
+    guardado = json.loads(registro.read_text(encoding="utf-8")) if registro.exists() else {}
+
+    pendientes, resultado = {}, {}
+    for valor, parte in df.groupby(columna, sort=False, observed=True):
+        ruta = Path(ruta_de(valor))
+        clave, huella = str(ruta.resolve()), hash_contenido(parte)
+        previo = guardado.get(clave, {})
+        if ruta.exists() and previo.get("hash") == huella and previo.get("archivo") == _huella_archivo(ruta):
+            resultado[ruta] = "sin cambios"
+        else:
+            pendientes[ruta] = (clave, huella, parte)
+
+    def escribir(ruta, parte):
+        escribir_excel(ruta, parte, modo=modo)
+        return ruta
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pendientes) or 1))) as pool:
+        futuros = {ruta: pool.submit(escribir, ruta, parte) for ruta, (_, _, parte) in pendientes.items()}
+        for ruta, futuro in futuros.items():
+            clave, huella, _ = pendientes[ruta]
+            try:
+                futuro.result()
+            except PermissionError as e:
+                resultado[ruta] = f"error: {e}"
+                guardado.pop(clave, None)
+                continue
+            guardado[clave] = {"hash": huella, "archivo": _huella_archivo(ruta)}
+            resultado[ruta] = "escrito"
+
+    registro.parent.mkdir(parents=True, exist_ok=True)
+    escribir_atomico(registro, lambda tmp: tmp.write_text(json.dumps(guardado, ensure_ascii=False, indent=2), encoding="utf-8"))
+    return resultado
@@ -0,0 +1,63 @@
+"""
+------------------------------------------------------------
+EXPORTAR PARQUET – Salida tipada para Power BI
+------------------------------------------------------------
+Autor: Héctor + IA (2025)
+------------------------------------------------------------
+Escribe el consolidado en Parquet (un archivo o un dataset particionado
+por columna). Necesita pyarrow; si no está instalado la exportación se
+omite con un aviso y el flujo en Excel sigue igual.
+
+El esquema de Arrow se arma a partir de los tipos declarados (no se
+infiere de los datos), así una columna category que en una ejecución
+queda toda vacía o cambia de cardinalidad conserva el mismo tipo.
+"""
+
+from cache_excel import escribir_atomico
+
+
+def pyarrow_disponible():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def tipo_arrow(tipo):
+    """Tipo de pyarrow para un tipo declarado de pandas (ver merge_escenario2.ESQUEMA_COLUMNAS)."""
+    import pyarrow as pa
+
+    if tipo == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    if tipo.startswith("datetime64"):
+        return pa.timestamp("ns")
+    if tipo == "Int64":
+        return pa.int64()
+    if tipo == "string":
+        return pa.string()
+    raise ValueError(f"Tipo sin equivalente en Parquet: {tipo}")
+
+
+def esquema_arrow(columnas, tipos):
+    """pyarrow.schema con las columnas en orden y el tipo declarado de cada una."""
+    import pyarrow as pa
+
+    return pa.schema([pa.field(col, tipo_arrow(tipos[col])) for col in columnas])
+
+
+def escribir_parquet(ruta, df, particionar_por=None, tipos=None):
+    """
+    Escribe `df` en Parquet. Con particionar_por (p. ej. "TIPO_DATASET") genera una
+    carpeta con una subcarpeta por valor. Con `tipos` ({columna: tipo de pandas}) el
+    esquema es el declarado. Devuelve la ruta escrita o None si no hay pyarrow.
+    """
+    if not pyarrow_disponible():
+        print("⚠️ pyarrow no está instalado: se omite la salida Parquet (pip install pyarrow).")
+        return None
+
+    opciones = {"schema": esquema_arrow(df.columns, tipos)} if tipos else {}
+    if particionar_por:
+        opciones["partition_cols"] = [particionar_por]
+    # Un archivo se reemplaza de forma atómica; una carpeta (o un cambio de modo) se borra antes de renombrar
+    return escribir_atomico(ruta, lambda tmp: df.to_parquet(tmp, engine="pyarrow", index=False, **opciones))
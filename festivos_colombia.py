@@ -0,0 +1,132 @@
+"""
+------------------------------------------------------------
+FESTIVOS DE COLOMBIA – Calendario hábil para el cálculo ANS
+------------------------------------------------------------
+Autor: Héctor + IA (2025)
+------------------------------------------------------------
+Calcula los festivos nacionales de cualquier año (fechas fijas,
+fechas basadas en la Pascua y traslados de la Ley Emiliani) y
+construye un np.busdaycalendar reutilizable por rango de años.
+"""
+
+import argparse
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# ------------------------------------------------------------
+# DEFINICIÓN DE FESTIVOS
+# ------------------------------------------------------------
+# Festivos que se celebran siempre en su fecha
+FESTIVOS_FIJOS = [
+    (1, 1, "Año Nuevo"),
+    (5, 1, "Día del Trabajo"),
+    (7, 20, "Independencia de Colombia"),
+    (8, 7, "Batalla de Boyacá"),
+    (12, 8, "Inmaculada Concepción"),
+    (12, 25, "Navidad"),
+]
+
+# Festivos que se trasladan al lunes siguiente (Ley 51 de 1983 – Ley Emiliani)
+FESTIVOS_TRASLADABLES = [
+    (1, 6, "Reyes Magos"),
+    (3, 19, "San José"),
+    (6, 29, "San Pedro y San Pablo"),
+    (8, 15, "Asunción de la Virgen"),
+    (10, 12, "Día de la Raza"),
+    (11, 1, "Todos los Santos"),
+    (11, 11, "Independencia de Cartagena"),
+]
+
+# Festivos relativos al Domingo de Pascua: (días desde Pascua, nombre, se traslada a lunes)
+FESTIVOS_PASCUA = [
+    (-3, "Jueves Santo", False),
+    (-2, "Viernes Santo", False),
+    (39, "Ascensión del Señor", True),
+    (60, "Corpus Christi", True),
+    (68, "Sagrado Corazón", True),
+]
+
+
+# ------------------------------------------------------------
+# FUNCIONES AUXILIARES
+# ------------------------------------------------------------
+def domingo_de_pascua(anio):
+    """Calcula el Domingo de Pascua (calendario gregoriano, algoritmo de Meeus/Jones/Butcher)."""
+    a = anio % 19
+    b, c = divmod(anio, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(anio, mes, dia + 1)
+
+
+def siguiente_lunes(fecha):
+    """Devuelve la misma fecha si es lunes o, si no, el lunes siguiente."""
+    return fecha + timedelta(days=(7 - fecha.weekday()) % 7)
+
+
+def festivos_colombia(anio_inicio, anio_fin=None):
+    """Lista ordenada de (fecha, nombre) con los festivos nacionales entre dos años (inclusive)."""
+    anio_fin = anio_inicio if anio_fin is None else anio_fin
+    festivos = []
+    for anio in range(anio_inicio, anio_fin + 1):
+        for mes, dia, nombre in FESTIVOS_FIJOS:
+            festivos.append((date(anio, mes, dia), nombre))
+
+        for mes, dia, nombre in FESTIVOS_TRASLADABLES:
+            festivos.append((siguiente_lunes(date(anio, mes, dia)), nombre))
+
+        pascua = domingo_de_pascua(anio)
+        for desplazamiento, nombre, trasladable in FESTIVOS_PASCUA:
+            fecha = pascua + timedelta(days=desplazamiento)
+            festivos.append((siguiente_lunes(fecha) if trasladable else fecha, nombre))
+
+    return sorted(festivos)
+
+
+def rango_anios(*fechas):
+    """Rango (año inicial, año final) que cubre las fechas dadas, con un año extra de margen al final."""
+    anios = []
+    for valor in fechas:
+        serie = pd.to_datetime(pd.Series(valor), errors="coerce").dropna()
+        if not serie.empty:
+            anios += [serie.min().year, serie.max().year]
+    if not anios:
+        hoy = date.today().year
+        return hoy, hoy + 1
+    return min(anios), max(anios) + 1
+
+
+@lru_cache(maxsize=None)
+def calendario_habil(weekmask="1111100", anio_inicio=None, anio_fin=None):
+    """Calendario hábil de Numpy (se construye una sola vez por weekmask y rango de años)."""
+    if anio_inicio is None:
+        anio_inicio, anio_fin = rango_anios()
+    anio_fin = anio_inicio if anio_fin is None else anio_fin
+    fechas = np.array([f for f, _ in festivos_colombia(anio_inicio, anio_fin)], dtype="datetime64[D]")
+    return np.busdaycalendar(weekmask=weekmask, holidays=fechas)
+
+
+# ------------------------------------------------------------
+# EJECUCIÓN DIRECTA (consulta de festivos)
+# ------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Lista los festivos nacionales de Colombia.")
+    parser.add_argument("anio_inicio", type=int)
+    parser.add_argument("anio_fin", type=int, nargs="?")
+    args = parser.parse_args()
+
+    for fecha, nombre in festivos_colombia(args.anio_inicio, args.anio_fin):
+        print(f"{fecha.isoformat()}  {fecha.strftime('%a')}  {nombre}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+------------------------------------------------------------
+ÍNDICE DE PEDIDOS – Duplicados y conflictos entre datasets
+------------------------------------------------------------
+Autor: Héctor + IA (2025)
+------------------------------------------------------------
+Cada limpieza deja en .estado_ans/ el índice de su dataset:
+clave de PEDIDO normalizada → dataset, fila y FECHA_INICIO_ANS.
+Con esos índices:
+  • duplicados dentro de un dataset  → misma clave repetida en el índice
+  • conflictos entre datasets        → misma clave en HV y PREPAGO, etc.
+se resuelven con una unión por hash sobre la clave (O(n)), sin volver a
+recorrer los DataFrames completos con duplicated().
+Solo se cruzan entre sí los datasets de DATASETS_CRUCE (los archivos de
+data_raw/). Otras fuentes, como FENIX, guardan su propio índice (para
+contar pedidos nuevos) pero no se cruzan: repiten los mismos pedidos.
+
+Uso:
+    python indice_pedidos.py            # conflictos entre los índices guardados
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from estado_incremental import ESTADO_DIR, cargar_indice, datasets_con_indice
+
+# ------------------------------------------------------------
+# CONFIGURACIÓN
+# ------------------------------------------------------------
+COLUMNAS_INDICE = ["CLAVE", "DATASET", "FILA", "FECHA_INICIO_ANS"]
+DATASETS_CRUCE = ["HV", "PUNTOS", "PREPAGO"]
+_DECIMAL_CERO = re.compile(r"^(\d+)\.0+$")
+
+
+# ------------------------------------------------------------
+# CLAVE DE PEDIDO
+# ------------------------------------------------------------
+def _clave(valor):
+    """23540476, 23540476.0, "23540476.0" y " 23540476 " dan la misma clave."""
+    if isinstance(valor, (float, np.floating)) and float(valor).is_integer():
+        return str(int(valor))
+    texto = str(valor).strip().upper()
+    if texto in ("", "NAN", "NONE", "SIN DATO", "SIN_PEDIDO"):
+        return np.nan
+    return _DECIMAL_CERO.sub(r"\1", texto)
+
+
+def clave_pedido(serie):
+    """Claves normalizadas de PEDIDO (una vez por valor distinto); los vacíos quedan como NaN."""
+    codigos, unicos = pd.factorize(serie)
+    claves = np.append(np.array([_clave(v) for v in unicos], dtype=object), np.nan)
+    return pd.Series(claves[codigos], index=serie.index, name="CLAVE")
+
+
+def _columna_pedido(df):
+    pedido = df["PEDIDO"]
+    if isinstance(pedido, pd.DataFrame):  # columna PEDIDO repetida: vale la primera, como en el MERGE
+        pedido = pedido.iloc[:, 0]
+    return pedido
+
+
+def entradas_indice(df, dataset):
+    """Índice de un dataset limpio: una fila por pedido con clave (los pedidos vacíos no entran)."""
+    pedido = _columna_pedido(df)
+    entradas = pd.DataFrame({
+        "CLAVE": clave_pedido(pedido).to_numpy(),
+        "DATASET": dataset,
+        "FILA": np.arange(len(df)),
+        "FECHA_INICIO_ANS": pd.to_datetime(df["FECHA_INICIO_ANS"], errors="coerce").to_numpy()
+        if "FECHA_INICIO_ANS" in df.columns else pd.NaT,
+    })
+    return entradas[entradas["CLAVE"].notna()].reset_index(drop=True)
+
+
+# ------------------------------------------------------------
+# DUPLICADOS Y CONFLICTOS
+# ------------------------------------------------------------
+def duplicados(entradas):
+    """Filas del índice cuya clave se repite dentro del mismo dataset."""
+    repetida = entradas.duplicated(subset=["DATASET", "CLAVE"], keep=False)
+    return entradas[repetida].sort_values(["DATASET", "CLAVE", "FILA"])
+
+
+def filas_repetidas(df, entradas):
+    """
+    Posiciones (ordenadas) de las filas de df para el archivo Duplicados_*: las de
+    claves repetidas en `entradas` (su índice) y, si hay más de una, las filas sin
+    pedido (vacío, NAN, SIN DATO…), que el índice no incluye pero que
+    duplicated(subset=["PEDIDO"]) siempre marcó como repetidas.
+    """
+    filas = duplicados(entradas)["FILA"].to_numpy()
+    sin_pedido = np.flatnonzero(clave_pedido(_columna_pedido(df)).isna().to_numpy())
+    if len(sin_pedido) > 1:
+        filas = np.union1d(filas, sin_pedido)
+    return np.sort(filas)
+
+
+def conflictos(entradas, otros):
+    """
+    Unión por hash de `entradas` contra el índice de `otros` datasets:
+    una fila por par (pedido de entradas, pedido igual en otro dataset).
+    """
+    if entradas.empty or otros.empty:
+        return pd.DataFrame(columns=COLUMNAS_INDICE + ["DATASET_OTRO", "FILA_OTRO", "FECHA_INICIO_ANS_OTRO"])
+    cruce = entradas.merge(otros, on="CLAVE", how="inner", suffixes=("", "_OTRO"))
+    cruce = cruce[cruce["DATASET"] != cruce["DATASET_OTRO"]]
+    return cruce.sort_values(["CLAVE", "DATASET", "DATASET_OTRO"]).reset_index(drop=True)
+
+
+def conflictos_entre(indice):
+    """Conflictos de un índice con varios datasets: cada par de datasets aparece una sola vez."""
+    cruce = conflictos(indice, indice)
+    return cruce[cruce["DATASET"] < cruce["DATASET_OTRO"]].reset_index(drop=True)
+
+
+def revisar_dataset(dataset, entradas, anteriores=None, estado_dir=ESTADO_DIR):
+    """
+    Compara el índice recién calculado de `dataset` con los guardados:
+    cuenta las claves nuevas (no estaban en su índice anterior) y, si es un
+    dataset de DATASETS_CRUCE, las cruza contra los índices guardados de los
+    otros. Devuelve el DataFrame de conflictos.
+    """
+    cruzar = dataset.upper() in DATASETS_CRUCE
+    otros = [cargar_indice(d, estado_dir) for d in datasets_con_indice(estado_dir)
+             if cruzar and d in DATASETS_CRUCE and d != dataset.upper()]
+    otros = pd.concat(otros, ignore_index=True) if otros else pd.DataFrame(columns=COLUMNAS_INDICE)
+    cruce = conflictos(entradas, otros)
+
+    if anteriores is not None:
+        nuevas = (~entradas["CLAVE"].isin(anteriores["CLAVE"])).sum()
+        print(f"🔑 {dataset}: {nuevas} pedidos nuevos en el índice ({len(entradas)} en total).")
+    if not cruce.empty:
+        resumen = cruce.groupby("DATASET_OTRO")["CLAVE"].nunique()
+        for otro, cantidad in resumen.items():
+            print(f"⚠️ {dataset}: {cantidad} pedidos también aparecen en {otro}.")
+    return cruce
+
+
+# ------------------------------------------------------------
+# EJECUCIÓN
+# ------------------------------------------------------------
+def main():
+    indices = [cargar_indice(d) for d in datasets_con_indice()]
+    if not indices:
+        print("ℹ️ No hay índices de pedidos guardados. Ejecuta primero la limpieza.")
+        return
+    indice = pd.concat(indices, ignore_index=True)
+    print(f"🔑 Índice de pedidos: {len(indice)} claves en {indice['DATASET'].nunique()} datasets.")
+
+    repetidos = duplicados(indice)
+    for dataset, cantidad in repetidos.groupby("DATASET")["CLAVE"].nunique().items():
+        print(f"⚠️ {dataset}: {cantidad} pedidos repetidos dentro del mismo archivo.")
+
+    cruce = conflictos_entre(indice[indice["DATASET"].isin(DATASETS_CRUCE)])
+    if cruce.empty:
+        print("✅ Ningún pedido aparece en más de un dataset.")
+    else:
+        print(f"⚠️ {cruce['CLAVE'].nunique()} pedidos aparecen en más de un dataset:")
+        print(cruce[["CLAVE", "DATASET", "DATASET_OTRO", "FECHA_INICIO_ANS", "FECHA_INICIO_ANS_OTRO"]].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+------------------------------------------------------------
+INGESTA FÉNIX – Lectura por bloques de los pendientes_*.csv
+------------------------------------------------------------
+Autor: Héctor + IA (2025)
+------------------------------------------------------------
+Los pendientes de Fénix traen 46 columnas, varias de texto libre con
+trazas de auditoría de varios KB por fila. Aquí se leen por bloques y
+solo con las columnas que necesita el cálculo ANS. Cada bloque se
+compacta antes de guardarlo (texto repetido como category, Pedido como
+número cuando lo es), así lo que se acumula es mucho menor que el CSV
+aunque el archivo pese cientos de MB.
+La salida ya tiene los nombres que espera limpiar_individual().
+
+Uso:
+    python ingesta_fenix.py                       (último data_raw/pendientes_*.csv)
+    python ingesta_fenix.py --input archivo.csv --dataset HV --output data_clean/FENIX_limpio.xlsx
+"""
+
+import argparse
+import codecs
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from categorias import es_categorica
+
+# ------------------------------------------------------------
+# CONFIGURACIÓN
+# ------------------------------------------------------------
+CARPETA_ENTRADA = Path("data_raw")
+PATRON_PENDIENTES = "pendientes_*.csv"
+SALIDA_POR_DEFECTO = Path("data_clean/FENIX_limpio.xlsx")
+FILAS_POR_BLOQUE = 50_000
+
+# Columna Fénix → nombre que reconoce limpiar_individual().
+# Días_ANS no se lee: son días calendario transcurridos al momento de la
+# exportación, y DIAS_TRANSCURRIDOS se recalcula en días hábiles a la fecha de corte.
+COLUMNAS_FENIX = {
+    "Pedido": "PEDIDO",
+    "Fecha_Ingreso_Sol": "FECHA_INGRESO",
+    "Fecha_Inicio_ANS": "FECHA_INICIO_ANS",
+    "Municipio": "MUNICIPIO",
+    "Area_Trabajo": "SECTOR",
+    "Actividad": "ACTIVIDAD",
+    "Tipo_Dirección": "ZONA",
+    "Estado": "ESTADO",
+}
+
+# Tipos declarados: evita que pandas infiera columna por columna en cada bloque.
+# Pedido se lee como texto (puede traer letras) y se normaliza en normalizar_pedido().
+# El texto de pocos valores queda como category (vacíos = NaN) desde la lectura.
+TIPOS_FENIX = {
+    "Pedido": str,
+    "Fecha_Ingreso_Sol": str,
+    "Fecha_Inicio_ANS": str,
+    "Municipio": "category",
+    "Area_Trabajo": "category",
+    "Actividad": "category",
+    "Tipo_Dirección": "category",
+    "Estado": "category",
+}
+
+OBLIGATORIAS = ["Pedido", "Fecha_Inicio_ANS"]
+
+
+# ------------------------------------------------------------
+# FUNCIONES AUXILIARES
+# ------------------------------------------------------------
+def detectar_codificacion(ruta, muestra=1 << 16):
+    """UTF-8 (con o sin BOM) si la muestra decodifica; si no, Latin-1 (exportación por defecto de Fénix)."""
+    with open(ruta, "rb") as f:
+        inicio = f.read(muestra)
+    if inicio.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        inicio.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # Un carácter multibyte cortado al final de la muestra no cuenta como error
+        if e.start < len(inicio) - 3:
+            return "latin-1"
+    return "utf-8"
+
+
+def ultimo_pendientes(carpeta=CARPETA_ENTRADA):
+    """Devuelve el pendientes_*.csv más reciente de la carpeta (o None)."""
+    archivos = sorted(Path(carpeta).glob(PATRON_PENDIENTES), key=lambda p: p.stat().st_mtime)
+    return archivos[-1] if archivos else None
+
+
+def normalizar_pedido(serie):
+    """
+    Pedido como llega de los Excel: entero si el texto es un número entero
+    (23540476, " 23540476 ", "23540476.0"), el texto sin espacios si no, y NaN si está vacío.
+    """
+    texto = serie.astype(object).where(serie.notna(), np.nan)
+    texto = texto.str.strip().replace("", np.nan)
+    numero = pd.to_numeric(texto, errors="coerce")
+    entero = (numero.notna() & (numero % 1 == 0)).to_numpy()
+    resultado = texto.copy()
+    resultado[entero] = [int(n) for n in numero[entero]]
+    return resultado
+
+
+def unir_bloques(bloques, columnas):
+    """Concatena los bloques; las columnas category se unen sin pasar por object (union_categoricals)."""
+    if not bloques:
+        return pd.DataFrame(columns=columnas)
+    unidas = {}
+    for col in columnas:
+        partes = [b[col] for b in bloques]
+        if all(es_categorica(p) for p in partes):
+            unidas[col] = union_categoricals(partes)
+        else:
+            unidas[col] = pd.concat(partes, ignore_index=True).to_numpy()
+    df = pd.DataFrame(unidas, columns=columnas)
+    # Si todos los pedidos son números, la columna queda entera (como en los Excel)
+    if "Pedido" in df.columns and df["Pedido"].dropna().map(type).eq(int).all():
+        df["Pedido"] = df["Pedido"].astype("Int64")
+    return df
+
+
+# ------------------------------------------------------------
+# LECTURA POR BLOQUES
+# ------------------------------------------------------------
+def leer_pendientes(ruta, filas_por_bloque=FILAS_POR_BLOQUE, encoding=None):
+    """
+    Lee el CSV de pendientes por bloques, solo con las columnas de COLUMNAS_FENIX
+    presentes en el archivo, y devuelve un DataFrame con los nombres ya renombrados.
+    Cada bloque se compacta (Pedido normalizado, texto como category) antes de guardarlo.
+    """
+    ruta = Path(ruta)
+    if not ruta.exists():
+        raise SystemExit(f"No se encontró el archivo: {ruta}")
+    encoding = encoding or detectar_codificacion(ruta)
+
+    # 🔹 Solo el encabezado, para validar columnas antes de recorrer el archivo
+    encabezado = pd.read_csv(ruta, encoding=encoding, nrows=0).columns.str.strip()
+    faltantes = [c for c in OBLIGATORIAS if c not in encabezado]
+    if faltantes:
+        raise SystemExit(f"❌ {ruta.name} no tiene las columnas obligatorias: {', '.join(faltantes)}")
+    usadas = [c for c in COLUMNAS_FENIX if c in encabezado]
+    omitidas = [c for c in COLUMNAS_FENIX if c not in encabezado]
+    if omitidas:
+        print(f"⚠️ Columnas no encontradas en {ruta.name} (quedan vacías): {', '.join(omitidas)}")
+
+    bloques = []
+    filas = 0
+    lector = pd.read_csv(
+        ruta,
+        encoding=encoding,
+        usecols=usadas,
+        dtype={c: TIPOS_FENIX[c] for c in usadas},
+        chunksize=filas_por_bloque,
+    )
+    with lector:
+        for bloque in lector:
+            if "Pedido" in bloque.columns:
+                bloque["Pedido"] = normalizar_pedido(bloque["Pedido"])
+            bloques.append(bloque)
+            filas += len(bloque)
+
+    df = unir_bloques(bloques, usadas).rename(columns=COLUMNAS_FENIX)
+    print(f"📥 {ruta.name}: {filas} filas, {len(usadas)} de {len(encabezado)} columnas ({encoding}, "
+          f"{len(bloques)} bloque(s) de hasta {filas_por_bloque}).")
+    return df
+
+
+# ------------------------------------------------------------
+# EJECUCIÓN
+# ------------------------------------------------------------
+def main():
+    import escenario1_individual as escenario1
+
+    parser = argparse.ArgumentParser(description="Limpieza ANS de un pendientes_*.csv de Fénix.")
+    parser.add_argument("--input", default=None, help=f"CSV de Fénix (por defecto el último {PATRON_PENDIENTES}).")
+    parser.add_argument("--dataset", default="HV", choices=["HV", "PUNTOS", "PREPAGO"],
+                        help="Reglas de DIAS_CUMP a aplicar.")
+    parser.add_argument("--output", default=str(SALIDA_POR_DEFECTO))
+    parser.add_argument("--filas-por-bloque", type=int, default=FILAS_POR_BLOQUE)
+    args = parser.parse_args()
+
+    entrada = Path(args.input) if args.input else ultimo_pendientes()
+    if entrada is None:
+        raise SystemExit(f"No hay archivos {PATRON_PENDIENTES} en {CARPETA_ENTRADA}/")
+
+    # Estado propio (FENIX_* en .estado_ans/): las reglas son de --dataset, pero la fuente no es la de data_raw/
+    limpio = escenario1.leer_y_limpiar(entrada, args.dataset, filas_por_bloque=args.filas_por_bloque,
+                                       clave_estado=escenario1.clave_de_salida(args.output))
+    escenario1.exportar_limpio(limpio, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,9 @@ Autor: Héctor A. Gaviria + IA (2025)
 ------------------------------------------------------------
 """
 
+import logging
 import os
-import subprocess
+import queue
 import threading
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
@@ -16,6 +17,9 @@ import sys
 import io
 from datetime import datetime  # 🕒 Para mostrar hora en el pie
 
+from etapas_ans import LOGGER, NOMBRES_ETAPAS
+from planificador_ans import CANCELADO, EJECUTANDO, ERROR, OMITIDO, PENDIENTE, TERMINADO, Planificador
+
 # ------------------------------------------------------------
 # CONFIGURACIÓN UTF-8 GLOBAL
 # ------------------------------------------------------------
@@ -28,9 +32,21 @@ if sys.stderr.encoding is None or sys.stderr.encoding.lower() != "utf-8":
 # RUTAS DE ARCHIVOS Y LOGO
 # ------------------------------------------------------------
 RUTA_LOGO = r"data_raw/elite.png"
-RUTA_HV = r"data_raw/PROGRAMACION HV SUR 2025.xlsx"
-RUTA_PUNTOS = r"data_raw/PROGRAMACION PUNTOS DE CONEXION.xlsx"
-RUTA_PREPAGO = r"data_raw/PROGRAMACION PREPAGO SUR 2025.xlsx"
+
+# Las etapas leen data_raw/ y escriben data_clean/ relativo a la carpeta del proyecto
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+# ------------------------------------------------------------
+# LOG DEL PANEL
+# ------------------------------------------------------------
+MAX_LINEAS_LOG = 2000       # Líneas que conserva el área de log (las más viejas se borran)
+INTERVALO_LOG_MS = 100      # Cada cuánto el hilo de Tk vacía la cola de log
+MAX_MENSAJES_POR_CICLO = 5000
+
+# ------------------------------------------------------------
+# TRABAJOS
+# ------------------------------------------------------------
+MAX_TRABAJADORES = 2        # Etapas que pueden correr al mismo tiempo (MERGE y CONTROL esperan lo anterior)
 
 # ------------------------------------------------------------
 # FUNCIÓN DE EFECTO VISUAL EN BOTONES
@@ -48,87 +64,169 @@ def restaurar_boton(boton, color_original):
     ventana.update_idletasks()
 
 # ------------------------------------------------------------
-# FUNCIÓN PRINCIPAL DE EJECUCIÓN
+# COLA HACIA EL HILO DE TK
 # ------------------------------------------------------------
-def ejecutar_comando(nombre, comando, boton=None):
-    """Ejecuta un script y muestra salida en el log."""
-    def tarea():
-        log_text.insert(tk.END, f"\n🚀 Iniciando {nombre}...\n", "info")
-        log_text.see(tk.END)
-        barra_progreso.start()
+# Los hilos de trabajo nunca tocan los widgets: dejan en la cola líneas de
+# log ("log", texto, etiqueta) o acciones ("ui", función, args), y el hilo
+# de Tk las aplica en lotes cada INTERVALO_LOG_MS.
+cola_ui = queue.Queue()
 
-        # 🟢 Mostrar estado en pie
-        hora = datetime.now().strftime("%I:%M %p")
-        pie_estado.config(text=f"🔄 Procesando {nombre}...  |  {hora}", fg="#1A5276")
-        ventana.update_idletasks()
 
-        color_original = resaltar_boton(boton) if boton else None
+def escribir_log(texto, etiqueta=None):
+    """Agrega texto al log del panel (seguro desde cualquier hilo)."""
+    cola_ui.put(("log", texto, etiqueta))
 
-        try:
-            proceso = subprocess.Popen(
-                comando,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-                cwd=os.path.dirname(os.path.abspath(__file__)),
-                encoding="utf-8"
-            )
-
-            for linea in proceso.stdout:
-                log_text.insert(tk.END, linea)
-                log_text.see(tk.END)
-
-            error_salida = proceso.stderr.read()
-            proceso.wait()
-
-            if proceso.returncode == 0:
-                log_text.insert(tk.END, f"\n✅ {nombre} completado con éxito.\n", "success")
-                hora = datetime.now().strftime("%I:%M %p")
-                pie_estado.config(text=f"✅ {nombre} completado con éxito.  |  {hora}", fg="#27AE60")
+
+def en_ui(funcion, *args):
+    """Ejecuta funcion(*args) en el hilo de Tk, en orden con el log."""
+    cola_ui.put(("ui", funcion, args))
+
+
+class ManejadorLog(logging.Handler):
+    """Envía cada línea del logger "ans" a la cola del panel."""
+
+    def emit(self, record):
+        etiqueta = "error" if record.levelno >= logging.ERROR else None
+        escribir_log(self.format(record) + "\n", etiqueta)
+
+
+def recortar_log():
+    """Deja solo las últimas MAX_LINEAS_LOG líneas en el área de log."""
+    lineas = int(log_text.index("end-1c").split(".")[0])
+    if lineas > MAX_LINEAS_LOG:
+        log_text.delete("1.0", f"{lineas - MAX_LINEAS_LOG + 1}.0")
+
+
+def drenar_cola():
+    """Aplica lo pendiente en la cola: textos seguidos con la misma etiqueta van en un solo insert."""
+    bloque, etiqueta_bloque, hubo_log = [], None, False
+
+    def volcar():
+        if bloque:
+            log_text.insert(tk.END, "".join(bloque), etiqueta_bloque)
+            bloque.clear()
+
+    try:
+        for _ in range(MAX_MENSAJES_POR_CICLO):
+            tipo, *datos = cola_ui.get_nowait()
+            if tipo == "log":
+                texto, etiqueta = datos
+                if etiqueta != etiqueta_bloque:
+                    volcar()
+                    etiqueta_bloque = etiqueta
+                bloque.append(texto)
+                hubo_log = True
             else:
-                log_text.insert(tk.END, f"\n❌ Error al ejecutar {nombre}:\n{error_salida}\n", "error")
-                pie_estado.config(text=f"⚠️ Error en {nombre}. Revisa el log.", fg="#C0392B")
+                volcar()
+                funcion, args = datos
+                funcion(*args)
+    except queue.Empty:
+        pass
+    finally:
+        volcar()
+        if hubo_log:
+            recortar_log()
+            log_text.see(tk.END)
+        ventana.after(INTERVALO_LOG_MS, drenar_cola)
+
 
-        except Exception as e:
-            log_text.insert(tk.END, f"\n⚠️ Error inesperado: {e}\n", "error")
-            pie_estado.config(text=f"⚠️ Error en {nombre}. Revisa el log.", fg="#C0392B")
+def mostrar_mensaje_panel(titulo, mensaje, tipo="info"):
+    """Avisos del MERGE / CONTROL: se muestran desde el panel y el trabajador espera el OK."""
+    listo = threading.Event()
 
+    def mostrar():
+        try:
+            (messagebox.showerror if tipo == "error" else messagebox.showinfo)(titulo, mensaje, parent=ventana)
         finally:
-            barra_progreso.stop()
-            if boton and color_original:
-                restaurar_boton(boton, color_original)
-            log_text.insert(tk.END, "-" * 60 + "\n", "separador")
-            log_text.see(tk.END)
-            pie_estado.config(text="⚙️ Esperando acción del usuario...", fg="#1B263B")
-            ventana.update_idletasks()
+            listo.set()
+
+    en_ui(mostrar)
+    listo.wait()
+
+
+# ------------------------------------------------------------
+# TRABAJOS DEL PLANIFICADOR (cada clic encola una etapa)
+# ------------------------------------------------------------
+colores_boton = {}  # etapa → color original mientras el botón está resaltado
+
+
+def ejecutar_etapa(etapa):
+    """Encola la etapa. Cada etapa espera a las que la afectan y se pidieron antes (ver planificador_ans.py)."""
+    trabajo, nuevo = planificador.enviar(etapa)
+    if not nuevo:
+        escribir_log(f"ℹ️ {NOMBRES_ETAPAS[etapa]} ya está en cola.\n", "info")
+
+
+def cancelar_pendientes():
+    cancelados = planificador.cancelar()
+    if not cancelados:
+        escribir_log("ℹ️ No hay trabajos en cola para cancelar.\n", "info")
+
+
+def al_cambiar_trabajo(trabajo, hechos, total):
+    """Aviso del planificador (desde cualquier hilo): log + actualización del panel."""
+    nombre = NOMBRES_ETAPAS[trabajo.etapa]
+    if trabajo.estado == PENDIENTE and hechos < total - 1:
+        escribir_log(f"🕒 {nombre} en cola (espera a los trabajos anteriores).\n", "info")
+    elif trabajo.estado == EJECUTANDO:
+        escribir_log(f"\n🚀 Iniciando {nombre}...\n", "info")
+    elif trabajo.estado == TERMINADO:
+        escribir_log(f"\n✅ {nombre} completado con éxito ({trabajo.segundos:.1f} s).\n", "success")
+        escribir_log("-" * 60 + "\n", "separador")
+    elif trabajo.estado == ERROR:
+        escribir_log(f"\n❌ Error al ejecutar {nombre}:\n{trabajo.error}\n", "error")
+        escribir_log("-" * 60 + "\n", "separador")
+    elif trabajo.estado == CANCELADO:
+        escribir_log(f"⏹️ {nombre} cancelado.\n", "separador")
+    elif trabajo.estado == OMITIDO:
+        escribir_log(f"⏭️ {nombre} omitido: {trabajo.error}.\n", "error")
+    en_ui(actualizar_panel, trabajo, hechos, total)
+
+
+def actualizar_panel(trabajo, hechos, total):
+    """Botón de la etapa, barra de progreso (trabajos terminados / pedidos) y pie."""
+    boton = BOTONES.get(trabajo.etapa)
+    if boton is not None:
+        if trabajo.estado == EJECUTANDO and trabajo.etapa not in colores_boton:
+            colores_boton[trabajo.etapa] = resaltar_boton(boton)
+        elif trabajo.estado in (TERMINADO, ERROR) and trabajo.etapa in colores_boton:
+            restaurar_boton(boton, colores_boton.pop(trabajo.etapa))
+
+    barra_progreso.config(maximum=max(total, 1), value=hechos)
+    hora = datetime.now().strftime("%I:%M %p")
+    en_curso = [NOMBRES_ETAPAS[t.etapa] for t in planificador.trabajos() if t.estado == EJECUTANDO]
+    if hechos < total:
+        texto = ", ".join(en_curso) if en_curso else "en espera"
+        pie_estado.config(text=f"🔄 Procesando {texto}...  |  {hechos}/{total} trabajos  |  {hora}", fg="#1A5276")
+    elif trabajo.estado == TERMINADO:
+        pie_estado.config(text=f"✅ {NOMBRES_ETAPAS[trabajo.etapa]} completado con éxito.  |  {hora}", fg="#27AE60")
+    elif trabajo.estado in (ERROR, OMITIDO):
+        pie_estado.config(text=f"⚠️ Error en {NOMBRES_ETAPAS[trabajo.etapa]}. Revisa el log.", fg="#C0392B")
+    else:
+        pie_estado.config(text="⚙️ Esperando acción del usuario...", fg="#1B263B")
 
-    threading.Thread(target=tarea).start()
 
 # ------------------------------------------------------------
 # COMANDOS DE LOS BOTONES
 # ------------------------------------------------------------
 def ejecutar_hv():
-    comando = f'python -X utf8 escenario1_individual.py --input "{RUTA_HV}" --dataset HV --output "data_clean/HV_limpio.xlsx"'
-    ejecutar_comando("HABITACIÓN VIVIENDAS", comando, btn_hv)
+    ejecutar_etapa("HV")
 
 def ejecutar_puntos():
-    comando = f'python -X utf8 escenario1_individual.py --input "{RUTA_PUNTOS}" --dataset PUNTOS --output "data_clean/PUNTOS_limpio.xlsx"'
-    ejecutar_comando("PUNTOS DE CONEXIÓN", comando, btn_puntos)
+    ejecutar_etapa("PUNTOS")
 
 def ejecutar_prepago():
-    comando = f'python -X utf8 escenario1_individual.py --input "{RUTA_PREPAGO}" --dataset PREPAGO --output "data_clean/PREPAGO_limpio.xlsx"'
-    ejecutar_comando("PREPAGO", comando, btn_prepago)
+    ejecutar_etapa("PREPAGO")
 
 def ejecutar_merge():
-    comando = 'python -X utf8 merge_escenario2.py'
-    ejecutar_comando("MERGE", comando, btn_merge)
+    ejecutar_etapa("MERGE")
+
+def ejecutar_todo():
+    # Proceso aparte (pipeline_ans.py --paralelo): la limpieza en paralelo usa varios procesos
+    ejecutar_etapa("TODO")
 
 def ejecutar_control_vacios():
-    comando = 'python -X utf8 diagnostico_control.py'
-    ejecutar_comando("CONTROL DE VACÍOS", comando, btn_vacios)
+    ejecutar_etapa("CONTROL")
 
 # ------------------------------------------------------------
 # INTERFAZ GRÁFICA
@@ -228,21 +326,42 @@ btn_merge = tk.Button(frame_botones, text="GENERAR MERGE", command=ejecutar_merg
 btn_merge.pack(side="left", padx=8)
 
 # ------------------------------------------------------------
-# BOTÓN ADICIONAL (CONTROL DE VACÍOS)
+# BOTONES ADICIONALES (EJECUTAR TODO / CONTROL DE VACÍOS)
 # ------------------------------------------------------------
 frame_boton_extra = tk.Frame(ventana, bg="#EAEDED")
 frame_boton_extra.pack(pady=(8, 5))
 
+btn_todo = tk.Button(frame_boton_extra, text="EJECUTAR TODO", command=ejecutar_todo,
+                     width=25, height=2, bg="#1E8449", fg="white", font=("Segoe UI", 10, "bold"),
+                     relief="ridge", borderwidth=3, cursor="hand2",
+                     activebackground="#229954", activeforeground="white")
+btn_todo.pack(side="left", padx=8)
+
 btn_vacios = tk.Button(frame_boton_extra, text="CONTROL DE VACÍOS", command=ejecutar_control_vacios,
                        width=25, height=2, bg="#1E8449", fg="white", font=("Segoe UI", 10, "bold"),
                        relief="ridge", borderwidth=3, cursor="hand2",
                        activebackground="#229954", activeforeground="white")
-btn_vacios.pack()
+btn_vacios.pack(side="left", padx=8)
+
+btn_cancelar = tk.Button(frame_boton_extra, text="CANCELAR PENDIENTES", command=cancelar_pendientes,
+                         width=25, height=2, bg="#7B7D7D", fg="white", font=("Segoe UI", 10, "bold"),
+                         relief="ridge", borderwidth=3, cursor="hand2",
+                         activebackground="#909497", activeforeground="white")
+btn_cancelar.pack(side="left", padx=8)
+
+BOTONES = {
+    "HV": btn_hv,
+    "PUNTOS": btn_puntos,
+    "PREPAGO": btn_prepago,
+    "MERGE": btn_merge,
+    "TODO": btn_todo,
+    "CONTROL": btn_vacios,
+}
 
 # ------------------------------------------------------------
 # BARRA DE PROGRESO
 # ------------------------------------------------------------
-barra_progreso = ttk.Progressbar(ventana, orient="horizontal", mode="indeterminate", length=450)
+barra_progreso = ttk.Progressbar(ventana, orient="horizontal", mode="determinate", length=450)
 barra_progreso.pack(pady=(5, 5))
 
 # ------------------------------------------------------------
@@ -306,7 +425,18 @@ pie_corporativo = tk.Label(
 pie_corporativo.pack(side="right", padx=(0, 15))
 
 
+# ------------------------------------------------------------
+# TRABAJADOR PERSISTENTE (carga pandas y los módulos en segundo plano)
+# ------------------------------------------------------------
+manejador_log = ManejadorLog()
+manejador_log.setFormatter(logging.Formatter("%(message)s"))
+LOGGER.addHandler(manejador_log)
+planificador = Planificador(MAX_TRABAJADORES, al_cambiar=al_cambiar_trabajo,
+                            mostrar_mensaje=mostrar_mensaje_panel).iniciar()
+drenar_cola()
+
 # ------------------------------------------------------------
 # INICIAR INTERFAZ
 # ------------------------------------------------------------
 ventana.mainloop()
+planificador.detener()
@@ -4,13 +4,26 @@ ESCENARIO 2 - MERGE CONSOLIDADO (HV / PUNTOS / PREPAGO)
 ------------------------------------------------------------
 Autor: Héctor + IA (2025)
 ------------------------------------------------------------
+Uso como módulo (sin ventanas ni archivos):
+    resultado = merge({"HV": df_hv, "PUNTOS": df_puntos, "PREPAGO": df_prepago})
+    exportar(resultado)
+Uso como script:
+    python merge_escenario2.py [--gui]
 """
 
+import argparse
 import pandas as pd
+from dataclasses import dataclass, field
 from pathlib import Path
-import re
 import numpy as np
-from tkinter import Tk, messagebox
+
+from cache_excel import escribir_atomico
+from categorias import categorizar, es_categorica, quitar_categorias, rellenar_categoria
+from exportar_excel import escribir_excel, escribir_particiones
+from exportar_parquet import escribir_parquet
+from indice_pedidos import conflictos_entre, entradas_indice
+from normalizacion import normalizar_columna
+from perfil_calidad import NOMBRE_INFORME, PerfilCalidad, guardar_informe, perfilar
 
 # ------------------------------------------------------------
 # 1️⃣ CONFIGURACIÓN INICIAL
@@ -23,37 +36,7 @@ archivos = {
     "PREPAGO": base_path / "PREPAGO_limpio.xlsx"
 }
 
-datasets = []
-
-# ------------------------------------------------------------
-# AVISO INFORMATIVO (no elimina filas, solo notifica)
-# ------------------------------------------------------------
-root = Tk()
-root.withdraw()  # Oculta la ventana principal
-messagebox.showinfo(
-    "Control ANS – MERGE CONSOLIDADO",
-    "El sistema conservará todos los registros.\n\n"
-    "Los valores vacíos serán reemplazados por indicadores visibles:\n"
-    "• 'SIN_PEDIDO' en pedidos vacíos\n"
-    "• 'SIN DATO' en texto\n"
-    "• '1900-01-01' en fechas\n"
-    "• 0 en números\n\n"
-    "Recuerda cerrar Excel antes de continuar."
-)
-root.destroy()
-
-
-# ------------------------------------------------------------
-# 2️⃣ CARGA Y LIMPIEZA DE CADA ARCHIVO
-# ------------------------------------------------------------
-# ------------------------------------------------------------
-# 2️⃣ CARGA Y LIMPIEZA DE CADA ARCHIVO (CON VALIDACIÓN ESTRUCTURAL)
-# ------------------------------------------------------------
 diagnostico_path = base_path / "Diagnostico_Estructura.txt"
-with open(diagnostico_path, "w", encoding="utf-8") as log:
-    log.write("------------------------------------------------------------\n")
-    log.write("📋 DIAGNÓSTICO DE ESTRUCTURA DE ARCHIVOS LIMPIOS - MERGE ANS\n")
-    log.write("------------------------------------------------------------\n")
 
 columnas_requeridas = [
     "PEDIDO", "MUNICIPIO", "FECHA_INGRESO", "FECHA_INICIO_ANS",
@@ -61,250 +44,451 @@ columnas_requeridas = [
     "DIAS_TRANSCURRIDOS", "DIAS_RESTANTES", "ESTADO"
 ]
 
-for nombre, ruta in archivos.items():
-    if ruta.exists():
-        df = pd.read_excel(ruta)
-
-        # 🔹 Registrar estructura detectada
-        with open(diagnostico_path, "a", encoding="utf-8") as log:
-            log.write(f"\n🗂️ Archivo: {ruta.name}\n")
-            log.write(f"Total columnas detectadas: {len(df.columns)}\n")
-            for col in df.columns:
-                log.write(f"   - {col}\n")
-
-        # 🔹 Normalizar encabezados
-        df.columns = df.columns.str.strip().str.upper()
-
-        # 🔹 Validar columnas requeridas
-        faltantes = [col for col in columnas_requeridas if col not in df.columns]
-        if faltantes:
-            mensaje = (
-                f"❌ ERROR: Faltan columnas obligatorias en el archivo {ruta.name}.\n\n"
-                f"Columnas faltantes: {', '.join(faltantes)}\n\n"
-                f"Revisa el formato antes de continuar.\n"
-                f"El proceso se detuvo para evitar errores en Power BI."
-            )
-            print(mensaje)
-            root = Tk()
-            root.withdraw()
-            messagebox.showerror("Error de estructura", mensaje)
-            root.destroy()
-            raise SystemExit("❌ Estructura inválida. Proceso detenido.")
-
-        # 🔹 Eliminar columna duplicada "PEDIDO" si existe más de una
-        columnas_pedido = [c for c in df.columns if "PEDIDO" in c]
-        if len(columnas_pedido) > 1:
-            print(f"⚠️ {nombre}: se detectó columna PEDIDO duplicada, se eliminará la segunda.")
-            df = df.loc[:, ~df.columns.duplicated()]
-            df = df.loc[:, ~df.columns.str.contains("PEDIDO.1", regex=True)]
-
-        # 🔹 Asegurar columnas consistentes
-        for col in columnas_requeridas:
-            if col not in df.columns:
-                df[col] = pd.NA
-
-        # 🔹 Reordenar y agregar tipo
-        df = df[columnas_requeridas]
-        df["TIPO_DATASET"] = nombre
-
-        datasets.append(df)
-        print(f"✅ {nombre} cargado correctamente ({len(df)} registros)")
-    else:
-        print(f"⚠️ No se encontró el archivo: {ruta}")
+# Tipos de la salida Parquet para Power BI (esquema estable entre ejecuciones)
+ESQUEMA_COLUMNAS = {
+    "PEDIDO": "string",
+    "MUNICIPIO": "category",
+    "FECHA_INGRESO": "datetime64[ns]",
+    "FECHA_INICIO_ANS": "datetime64[ns]",
+    "ZONA": "category",
+    "SECTOR": "category",
+    "DIAS_CUMP": "Int64",
+    "FECHA_LIMITE": "datetime64[ns]",
+    "DIAS_TRANSCURRIDOS": "Int64",
+    "DIAS_RESTANTES": "string",
+    "ESTADO": "category",
+    "TIPO_DATASET": "category",
+}
 
-with open(diagnostico_path, "a", encoding="utf-8") as log:
-    log.write("\n✅ Validación completada. No se detectaron errores estructurales.\n")
-# ------------------------------------------------------------
-# 3️⃣ MERGE FINAL ORIGINAL
-# ------------------------------------------------------------
-if not datasets:
-    raise SystemExit("❌ No se encontró ningún archivo limpio para consolidar.")
+# Indicador visible de vacío para cada columna de MERGE_ANS_FINAL (del mismo tipo que la columna).
+# Excepción: DIAS_TRANSCURRIDOS sin FECHA_INICIO_ANS no tiene días que medir y un 0 parecería
+# una medición real, así que lleva "SIN DATO" (los días siguen siendo números; el Parquet la
+# guarda como Int64 con nulos).
+FECHA_CENTINELA = pd.Timestamp("1900-01-01")
+CENTINELAS_POWERBI = {
+    "PEDIDO": "SIN_PEDIDO",
+    "MUNICIPIO": "SIN DATO",
+    "FECHA_INGRESO": FECHA_CENTINELA,
+    "FECHA_INICIO_ANS": FECHA_CENTINELA,
+    "ZONA": "SIN DATO",
+    "SECTOR": "SIN DATO",
+    "DIAS_CUMP": 0,
+    "FECHA_LIMITE": FECHA_CENTINELA,
+    "DIAS_TRANSCURRIDOS": "SIN DATO",
+    "DIAS_RESTANTES": "SIN DATO",
+    "ESTADO": "SIN DATO",
+    "TIPO_DATASET": "SIN DATO",
+}
+
+# Textos que se consideran vacíos
+VALORES_VACIOS = ["", " ", "NaN", "NAN", "None"]
+
+# Las reglas de texto (MUNICIPIO, SECTOR, ESTADO) están en normalizacion.py
+
+
+class ErrorEstructura(Exception):
+    """Un dataset limpio no trae las columnas obligatorias."""
+
+
+class SinDatasets(Exception):
+    """No llegó ningún dataset limpio para consolidar."""
 
-consolidado = pd.concat(datasets, ignore_index=True)
-print(f"\n🔹 Registros combinados totales: {len(consolidado)}")
 
-# ⚠️ NO eliminar vacíos ni duplicados aquí (archivo original)
-salida_total = base_path / "MERGE_ANS.xlsx"
-consolidado.to_excel(salida_total, index=False)
-print(f"\n📦 Archivo consolidado original generado (intacto): {salida_total}")
+@dataclass
+class MergeResult:
+    """Resultado del MERGE: tablas listas para exportar y diagnósticos como datos."""
+    consolidado_original: pd.DataFrame
+    consolidado: pd.DataFrame
+    merge_para_powerbi: pd.DataFrame
+    resumen_general: pd.DataFrame
+    alerta_vacios: pd.DataFrame
+    conteo_sector_estado: pd.Series
+    diagnostico_estructura: list = field(default_factory=list)
+    avisos: list = field(default_factory=list)
+    control_vacios: PerfilCalidad = None  # perfil de merge_para_powerbi (CONTROL DE VACÍOS)
+    conflictos_pedido: pd.DataFrame = None  # mismo PEDIDO en más de un dataset
+    salidas_bloqueadas: list = field(default_factory=list)  # archivos que exportar() no pudo reemplazar
+
 
 # ------------------------------------------------------------
-# 4️⃣ LIMPIEZA Y NORMALIZACIÓN DE TEXTO (FINAL)
+# AVISOS GRÁFICOS (solo con gui=True)
 # ------------------------------------------------------------
-for col in ["MUNICIPIO", "SECTOR", "ESTADO"]:
-    consolidado[col] = (
-        consolidado[col]
-        .astype(str)
-        .str.upper()
-        .str.strip()
-        .str.replace(r"–", "-", regex=True)
-        .str.replace(r"\s+", " ", regex=True)
-        .str.replace(r"Á", "A", regex=True)
-        .str.replace(r"É", "E", regex=True)
-        .str.replace(r"Í", "I", regex=True)
-        .str.replace(r"Ó", "O", regex=True)
-        .str.replace(r"Ú", "U", regex=True)
-    )
+# Si se asigna (p. ej. desde el panel de control), los avisos se muestran con
+# esta función (titulo, mensaje, tipo) en lugar de abrir una ventana propia.
+MOSTRAR_MENSAJE = None
 
-# 🔹 LIMPIEZA DE SECTOR
-reemplazos_sector = {
-    "OCCIDENETE": "OCCIDENTE",
-    "OCCIDENTE - OLAYA": "OCCIDENTE",
-    "OCCIDENTE - SAN CRISTOBAL": "OCCIDENTE",
-    "OCCIDENTE – AGUAS FRIAS": "OCCIDENTE",
-    "OCCIDENTE-AGUAS FRIAS": "OCCIDENTE",
-    "SUR - SABANETA": "SUR",
-    "SUR - AGIZAL": "SUR",
-    "SUR-S.PRADO": "SUR",
-    "SUR-SABANETA": "SUR",
-    "SUR ITAGUI AGIZAL": "SUR",
-    "SUR-LIMONAR": "SUR",
-    "ENV": "SUR",
-    "REPL": np.nan,
-    "NORTE": np.nan
-}
-consolidado["SECTOR"] = consolidado["SECTOR"].replace(reemplazos_sector)
-
-def limpiar_sector(valor):
-    if pd.isna(valor):
-        return np.nan
-    if re.match(r"^OCCIDENTE", valor):
-        return "OCCIDENTE"
-    elif re.match(r"^SUR", valor):
-        return "SUR"
-    elif re.match(r"^ORIENTE", valor):
-        return "ORIENTE"
-    elif re.match(r"^LA ESTRELLA", valor):
-        return "SUR"
+
+def mostrar_mensaje(titulo, mensaje, tipo="info"):
+    """Muestra un messagebox de Tk en una ventana oculta."""
+    if MOSTRAR_MENSAJE is not None:
+        return MOSTRAR_MENSAJE(titulo, mensaje, tipo)
+
+    from tkinter import Tk, messagebox
+
+    root = Tk()
+    root.withdraw()  # Oculta la ventana principal
+    if tipo == "error":
+        messagebox.showerror(titulo, mensaje)
     else:
-        return valor
-
-consolidado["SECTOR"] = consolidado["SECTOR"].apply(limpiar_sector)
-consolidado["SECTOR"] = consolidado["SECTOR"].replace(["NAN", "NONE", "NULL", "PD.NA", "SIN DATO"], np.nan)
-
-# 🔹 LIMPIEZA DE MUNICIPIO
-reemplazos_municipio = {
-    "MED": "MEDELLIN",
-    "MEDLLIN": "MEDELLIN",
-    "ENVIG": "ENVIGADO",
-    "ENV": "ENVIGADO",
-    "SAB": "SABANETA",
-    "LA ESTRELLA": "LA ESTRELLA",
-    "CAL": "CALDAS",
-    "GUAR": "GUARNE",
-    "ESTR": "LA ESTRELLA",
-    "EL RET": "EL RETIRO",
-    "ENVI": "ENVIGADO"
-}
-consolidado["MUNICIPIO"] = consolidado["MUNICIPIO"].replace(reemplazos_municipio)
-
-# 🔹 LIMPIEZA DE ESTADO
-reemplazos_estado = {
-    "VENC": "VENCIDO",
-    "VENCID": "VENCIDO",
-    "CUMP": "CUMPLIDO",
-    "ALER": "ALERTA",
-    "SINFECHA": "SIN FECHA",
-    "SIN FECHAS": "SIN FECHA"
-}
-consolidado["ESTADO"] = consolidado["ESTADO"].replace(reemplazos_estado)
+        messagebox.showinfo(titulo, mensaje)
+    root.destroy()
+
 
 # ------------------------------------------------------------
-# 5️⃣ DIAGNÓSTICO DE CALIDAD
+# AVISO INFORMATIVO (no elimina filas, solo notifica)
 # ------------------------------------------------------------
-print("\n📊 Diagnóstico de valores únicos después de limpieza:")
-print("SECTOR     →", consolidado["SECTOR"].dropna().unique())
-print("MUNICIPIO  →", consolidado["MUNICIPIO"].dropna().unique()[:10])
-print("ESTADO     →", consolidado["ESTADO"].dropna().unique())
+def aviso_inicial():
+    mostrar_mensaje(
+        "Control ANS – MERGE CONSOLIDADO",
+        "El sistema conservará todos los registros.\n\n"
+        "Los valores vacíos serán reemplazados por indicadores visibles:\n"
+        "• 'SIN_PEDIDO' en pedidos vacíos\n"
+        "• 'SIN DATO' en texto\n"
+        "• '1900-01-01' en fechas\n"
+        "• 0 en números ('SIN DATO' en DIAS_TRANSCURRIDOS sin fecha de inicio)\n\n"
+        "Recuerda cerrar Excel antes de continuar."
+    )
 
-print("\n📈 Conteo por SECTOR y ESTADO:")
-print(consolidado.groupby(["SECTOR", "ESTADO"]).size())
 
 # ------------------------------------------------------------
-# 6️⃣ MERGE PARA POWER BI (CONSERVA TODO Y RELLENA VACÍOS)
+# 2️⃣ CARGA Y LIMPIEZA DE CADA ARCHIVO (CON VALIDACIÓN ESTRUCTURAL)
 # ------------------------------------------------------------
-print("\n🔍 Preparando MERGE_ANS_FINAL con valores visibles para análisis en Power BI...")
+def cargar_limpios(archivos):
+    """Lee los *_limpio.xlsx disponibles y devuelve {dataset: DataFrame}."""
+    frames = {}
+    for nombre, ruta in archivos.items():
+        if ruta.exists():
+            frames[nombre] = pd.read_excel(ruta)
+        else:
+            print(f"⚠️ No se encontró el archivo: {ruta}")
+    return frames
+
+
+def preparar_dataset(nombre, df, diagnostico, avisos):
+    """Valida la estructura de un dataset limpio y lo deja con columnas_requeridas + TIPO_DATASET."""
+    # 🔹 Los vacíos en memoria ("") se tratan igual que al leer el Excel intermedio
+    df = df.replace("", np.nan)
+
+    # 🔹 Registrar estructura detectada
+    archivo = archivos.get(nombre, base_path / f"{nombre}_limpio.xlsx").name
+    diagnostico.append(f"\n🗂️ Archivo: {archivo}")
+    diagnostico.append(f"Total columnas detectadas: {len(df.columns)}")
+    for col in df.columns:
+        diagnostico.append(f"   - {col}")
+
+    # 🔹 Normalizar encabezados
+    df.columns = df.columns.str.strip().str.upper()
+
+    # 🔹 Validar columnas requeridas
+    faltantes = [col for col in columnas_requeridas if col not in df.columns]
+    if faltantes:
+        raise ErrorEstructura(
+            f"❌ ERROR: Faltan columnas obligatorias en el archivo {archivo}.\n\n"
+            f"Columnas faltantes: {', '.join(faltantes)}\n\n"
+            f"Revisa el formato antes de continuar.\n"
+            f"El proceso se detuvo para evitar errores en Power BI."
+        )
+
+    # 🔹 Eliminar columna duplicada "PEDIDO" si existe más de una
+    columnas_pedido = [c for c in df.columns if "PEDIDO" in c]
+    if len(columnas_pedido) > 1:
+        avisos.append(f"⚠️ {nombre}: se detectó columna PEDIDO duplicada, se eliminará la segunda.")
+        df = df.loc[:, ~df.columns.duplicated()]
+        df = df.loc[:, ~df.columns.str.contains("PEDIDO.1", regex=True)]
+
+    # 🔹 Asegurar columnas consistentes
+    for col in columnas_requeridas:
+        if col not in df.columns:
+            df[col] = pd.NA
+
+    # 🔹 Reordenar y agregar tipo
+    df = df[columnas_requeridas]
+    df["TIPO_DATASET"] = nombre
+
+    avisos.append(f"✅ {nombre} cargado correctamente ({len(df)} registros)")
+    return df
+
+
+def normalizar_texto(consolidado):
+    """
+    Normaliza MUNICIPIO, SECTOR y ESTADO con el motor de normalizacion.py
+    (una vez por valor distinto). Las columnas de pocos valores, también
+    ZONA y TIPO_DATASET, quedan como category.
+    """
+    for col in ["MUNICIPIO", "SECTOR", "ESTADO"]:
+        consolidado[col] = normalizar_columna(consolidado[col], col)
+    return categorizar(consolidado)
+
+
+def rellenar_columna(serie, tipo, centinela):
+    """Una pasada por columna: vacíos → centinela, conservando un tipo único."""
+    if es_categorica(serie):
+        return rellenar_categoria(quitar_categorias(serie, VALORES_VACIOS), centinela)
+    if tipo.startswith("datetime64"):
+        return pd.to_datetime(serie, errors="coerce").fillna(centinela).astype(tipo)
+    if tipo == "Int64":
+        numeros = pd.to_numeric(serie, errors="coerce").round()
+        if isinstance(centinela, str):
+            # Centinela de texto: enteros + indicador (object), como en la hoja de Excel
+            enteros = numeros.astype("Int64").astype(object)
+            return enteros.where(numeros.notna(), centinela)
+        return numeros.fillna(centinela).astype("int64")
+
+    # Texto y PEDIDO: los valores se conservan tal cual (los pedidos numéricos siguen siendo números)
+    vacio = serie.isna().to_numpy() | serie.isin(VALORES_VACIOS).to_numpy()
+    return serie.where(~vacio, centinela) if vacio.any() else serie
+
+
+def rellenar_para_powerbi(consolidado):
+    """Copia del consolidado con los vacíos reemplazados por indicadores visibles (CENTINELAS_POWERBI)."""
+    return pd.DataFrame({
+        col: rellenar_columna(
+            consolidado[col],
+            ESQUEMA_COLUMNAS.get(col, "string"),
+            CENTINELAS_POWERBI.get(col, "SIN DATO"),
+        )
+        for col in consolidado.columns
+    }, index=consolidado.index)
+
+
+def tipar_consolidado(consolidado):
+    """Copia del consolidado con los tipos de ESQUEMA_COLUMNAS (vacíos como nulos reales)."""
+    tipado = pd.DataFrame(index=consolidado.index)
+    for col, tipo in ESQUEMA_COLUMNAS.items():
+        serie = consolidado[col]
+        if tipo.startswith("datetime64"):
+            tipado[col] = pd.to_datetime(serie, errors="coerce").astype(tipo)
+        elif tipo == "Int64":
+            tipado[col] = pd.to_numeric(serie, errors="coerce").round().astype("Int64")
+        elif col == "PEDIDO":
+            # Los pedidos numéricos se guardan sin ".0" (p. ej. 23540476.0 → "23540476")
+            numero = pd.to_numeric(serie, errors="coerce")
+            entero = numero.notna() & (numero % 1 == 0)
+            texto = serie.astype("string")
+            texto[entero] = numero[entero].astype("int64").astype("string")
+            tipado[col] = texto
+        else:
+            tipado[col] = serie.astype(tipo)
+    return tipado
 
-merge_para_powerbi = consolidado.copy()
 
-# 🔹 Reemplazar valores vacíos por indicadores visibles
-# 🔹 Reemplazar valores vacíos por indicadores visibles
-for col in merge_para_powerbi.columns:
-    # 🔸 Primero, limpiar espacios y valores tipo "nan", "None", etc.
-    merge_para_powerbi[col] = merge_para_powerbi[col].replace(
-        ["", " ", "NaN", "NAN", "None", None, np.nan], pd.NA
+# ------------------------------------------------------------
+# 3️⃣–6️⃣ MERGE (sin efectos secundarios)
+# ------------------------------------------------------------
+def merge(frames):
+    """
+    Consolida {dataset: DataFrame limpio} y devuelve un MergeResult.
+    No muestra ventanas, no imprime y no escribe archivos.
+    Lanza ErrorEstructura si un dataset no trae las columnas obligatorias
+    y SinDatasets si no hay ninguno.
+    """
+    diagnostico = [
+        "------------------------------------------------------------",
+        "📋 DIAGNÓSTICO DE ESTRUCTURA DE ARCHIVOS LIMPIOS - MERGE ANS",
+        "------------------------------------------------------------",
+    ]
+    avisos = []
+    datasets = [preparar_dataset(nombre, df, diagnostico, avisos) for nombre, df in frames.items()]
+    diagnostico.append("\n✅ Validación completada. No se detectaron errores estructurales.")
+
+    if not datasets:
+        raise SinDatasets("❌ No se encontró ningún archivo limpio para consolidar.")
+
+    # 🔹 Mismo PEDIDO en más de un dataset (unión por hash sobre la clave normalizada)
+    indice = pd.concat([entradas_indice(df, nombre) for nombre, df in zip(frames, datasets)], ignore_index=True)
+    conflictos = conflictos_entre(indice)
+    if not conflictos.empty:
+        avisos.append(f"⚠️ {conflictos['CLAVE'].nunique()} pedidos aparecen en más de un dataset "
+                      f"(ver Conflictos_PEDIDO.xlsx).")
+
+    # ⚠️ NO eliminar vacíos ni duplicados aquí (archivo original)
+    consolidado_original = pd.concat(datasets, ignore_index=True)
+    consolidado = normalizar_texto(consolidado_original.copy())
+
+    # 🔹 Vacíos originales (antes del reemplazo), duplicados y filas vacías en una pasada
+    perfil = perfilar(consolidado)
+    merge_para_powerbi = rellenar_para_powerbi(consolidado)
+
+    return MergeResult(
+        consolidado_original=consolidado_original,
+        consolidado=consolidado,
+        merge_para_powerbi=merge_para_powerbi,
+        resumen_general=perfil.resumen_general(),
+        alerta_vacios=perfil.alerta_vacios(),
+        conteo_sector_estado=consolidado.groupby(["SECTOR", "ESTADO"], observed=True).size(),
+        diagnostico_estructura=diagnostico,
+        avisos=avisos,
+        control_vacios=perfilar(merge_para_powerbi),
+        conflictos_pedido=conflictos,
     )
 
-    # 🔸 Ahora aplicar los reemplazos según tipo de dato
-    if col == "PEDIDO":
-        merge_para_powerbi[col] = merge_para_powerbi[col].fillna("SIN_PEDIDO")
-    elif merge_para_powerbi[col].dtype in ["float64", "int64"]:
-        merge_para_powerbi[col] = merge_para_powerbi[col].fillna(0)
-    elif "FECHA" in col:
-        merge_para_powerbi[col] = merge_para_powerbi[col].fillna("1900-01-01")
+
+# ------------------------------------------------------------
+# DIAGNÓSTICO EN CONSOLA Y EXPORTACIÓN
+# ------------------------------------------------------------
+def imprimir_diagnostico(resultado):
+    """Muestra en consola los avisos y el diagnóstico de calidad del MERGE."""
+    for aviso in resultado.avisos:
+        print(aviso)
+
+    consolidado = resultado.consolidado
+    print(f"\n🔹 Registros combinados totales: {len(consolidado)}")
+
+    print("\n📊 Diagnóstico de valores únicos después de limpieza:")
+    print("SECTOR     →", np.asarray(consolidado["SECTOR"].dropna().unique()))
+    print("MUNICIPIO  →", np.asarray(consolidado["MUNICIPIO"].dropna().unique())[:10])
+    print("ESTADO     →", np.asarray(consolidado["ESTADO"].dropna().unique()))
+
+    print("\n📈 Conteo por SECTOR y ESTADO:")
+    print(resultado.conteo_sector_estado)
+
+
+def _escribir_salida(resultado, ruta, escribir, gui=False):
+    """
+    Ejecuta escribir() y devuelve lo que retorne. Si la salida está abierta en Excel
+    o Power BI (PermissionError) la anota en resultado.salidas_bloqueadas, avisa y
+    devuelve None.
+    """
+    try:
+        return escribir()
+    except PermissionError:
+        resultado.salidas_bloqueadas.append(ruta)
+        if gui:
+            mostrar_mensaje(
+                "Error de Permiso",
+                f"No se pudo generar el archivo {ruta.name}.\n\n"
+                "Causa: El archivo está abierto en Excel o Power BI.\n\n"
+                "Cierra el archivo y vuelve a ejecutar el proceso.",
+                tipo="error",
+            )
+        print(f"❌ Error: El archivo {ruta.name} está abierto. Cierra Excel y vuelve a ejecutar.")
+        return None
+
+
+def exportar(resultado, base_path=base_path, gui=False, parquet=True, parquet_particionado=False):
+    """
+    Escribe el diagnóstico, MERGE_ANS.xlsx, MERGE_ANS_FINAL.xlsx (+ .parquet) y los *_filtrado.xlsx.
+    Los archivos que no se pudieron reemplazar (abiertos en Excel) quedan en resultado.salidas_bloqueadas.
+    """
+    base_path = Path(base_path)
+    resultado.salidas_bloqueadas = []
+    salida_diagnostico = base_path / diagnostico_path.name
+    _escribir_salida(resultado, salida_diagnostico, lambda: escribir_atomico(
+        salida_diagnostico,
+        lambda tmp: tmp.write_text("\n".join(resultado.diagnostico_estructura) + "\n", encoding="utf-8"),
+    ), gui)
+
+    salida_total = base_path / "MERGE_ANS.xlsx"
+    if _escribir_salida(resultado, salida_total, lambda: escribir_excel(salida_total, resultado.consolidado_original), gui):
+        print(f"\n📦 Archivo consolidado original generado (intacto): {salida_total}")
+
+    print("\n🔍 Preparando MERGE_ANS_FINAL con valores visibles para análisis en Power BI...")
+
+    # 🔹 Guardar en un solo archivo Excel con múltiples hojas
+    salida_powerbi = base_path / "MERGE_ANS_FINAL.xlsx"
+
+    # 🟢 Aviso preventivo antes de exportar
+    if gui:
+        mostrar_mensaje(
+            "Control ANS - MERGE CONSOLIDADO",
+            "Antes de continuar, asegúrate de que el archivo MERGE_ANS_FINAL.xlsx esté cerrado.\n\n"
+            "Esto evitará errores de permiso durante la exportación."
+        )
+
+    if _escribir_salida(resultado, salida_powerbi, lambda: escribir_excel(salida_powerbi, {
+        "MERGE_ANS_FINAL": resultado.merge_para_powerbi,
+        "Resumen_General": resultado.resumen_general,
+        "ALERTA_DATOS_VACIOS": resultado.alerta_vacios,
+    }), gui):
+        print(f"📁 Archivo listo para Power BI: {salida_powerbi}")
+        print(f"📊 Incluye hojas 'MERGE_ANS_FINAL', 'Resumen_General' y 'ALERTA_DATOS_VACIOS'.")
+        print("✅ Todos los vacíos fueron reemplazados con valores visibles (SIN DATO, 0, 1900-01-01).")
+
+        # 🔹 Informe para CONTROL DE VACÍOS (evita volver a leer MERGE_ANS_FINAL.xlsx)
+        if resultado.control_vacios is not None:
+            salida_informe = base_path / NOMBRE_INFORME
+            _escribir_salida(resultado, salida_informe, lambda: guardar_informe(
+                resultado.control_vacios, resultado.merge_para_powerbi, salida_informe
+            ), gui)
+
+    # 🔹 Versión tipada para Power BI (fechas, categorías y enteros reales)
+    if parquet:
+        salida_parquet = base_path / ("MERGE_ANS_FINAL_parquet" if parquet_particionado else "MERGE_ANS_FINAL.parquet")
+        escrito = _escribir_salida(resultado, salida_parquet, lambda: escribir_parquet(
+            salida_parquet,
+            tipar_consolidado(resultado.consolidado),
+            particionar_por="TIPO_DATASET" if parquet_particionado else None,
+            tipos=ESQUEMA_COLUMNAS,
+        ), gui)
+        if escrito:
+            print(f"🧱 Salida Parquet para Power BI: {escrito}")
+
+    # 🔹 Pedidos repetidos entre datasets
+    salida_conflictos = base_path / "Conflictos_PEDIDO.xlsx"
+    if resultado.conflictos_pedido is not None and not resultado.conflictos_pedido.empty:
+        if _escribir_salida(resultado, salida_conflictos, lambda: escribir_excel(salida_conflictos, resultado.conflictos_pedido), gui):
+            print(f"⚠️ Pedidos en más de un dataset: {salida_conflictos}")
     else:
-        merge_para_powerbi[col] = merge_para_powerbi[col].fillna("SIN DATO")
-
-# 🔹 Crear hoja resumen de vacíos originales (antes del reemplazo)
-vacios_por_columna = consolidado.isna().sum()
-porcentaje_vacios = (vacios_por_columna / len(consolidado) * 100).round(2)
-
-df_alerta = pd.DataFrame({
-    "Columna": vacios_por_columna.index,
-    "Valores_Vacíos": vacios_por_columna.values,
-    "Porcentaje (%)": porcentaje_vacios.values
-}).sort_values(by="Valores_Vacíos", ascending=False)
-
-# 🔹 Generar hoja con resumen general
-df_resumen = pd.DataFrame({
-    "Métrica": [
-        "Total de registros",
-        "Filas duplicadas",
-        "Filas completamente vacías"
-    ],
-    "Valor": [
-        len(consolidado),
-        consolidado.duplicated().sum(),
-        consolidado.isna().all(axis=1).sum()
-    ]
-})
-# 🔹 Guardar en un solo archivo Excel con múltiples hojas
-salida_powerbi = base_path / "MERGE_ANS_FINAL.xlsx"
-
-# 🟢 Aviso preventivo antes de exportar
-from tkinter import messagebox
-messagebox.showinfo(
-    "Control ANS - MERGE CONSOLIDADO",
-    "Antes de continuar, asegúrate de que el archivo MERGE_ANS_FINAL.xlsx esté cerrado.\n\n"
-    "Esto evitará errores de permiso durante la exportación."
-)
-
-try:
-    with pd.ExcelWriter(salida_powerbi, engine="openpyxl") as writer:
-        merge_para_powerbi.to_excel(writer, sheet_name="MERGE_ANS_FINAL", index=False)
-        df_resumen.to_excel(writer, sheet_name="Resumen_General", index=False)
-        df_alerta.to_excel(writer, sheet_name="ALERTA_DATOS_VACIOS", index=False)
-
-    print(f"📁 Archivo listo para Power BI: {salida_powerbi}")
-    print(f"📊 Incluye hojas 'MERGE_ANS_FINAL', 'Resumen_General' y 'ALERTA_DATOS_VACIOS'.")
-    print("✅ Todos los vacíos fueron reemplazados con valores visibles (SIN DATO, 0, 1900-01-01).")
-
-except PermissionError:
-    messagebox.showerror(
-        "Error de Permiso",
-        "No se pudo generar el archivo MERGE_ANS_FINAL.xlsx.\n\n"
-        "Causa: El archivo está abierto en Excel o Power BI.\n\n"
-        "Cierra el archivo y vuelve a ejecutar el proceso."
+        _escribir_salida(resultado, salida_conflictos, lambda: salida_conflictos.unlink(missing_ok=True), gui)
+
+    # ------------------------------------------------------------
+    # 7️⃣ (OPCIONAL) ARCHIVOS SEPARADOS POR TIPO
+    # ------------------------------------------------------------
+    # Un solo groupby; las partes se escriben en paralelo y las que no cambiaron se saltan
+    particiones = escribir_particiones(
+        resultado.consolidado, "TIPO_DATASET", lambda tipo: base_path / f"{tipo}_filtrado.xlsx"
     )
-    print("❌ Error: El archivo MERGE_ANS_FINAL.xlsx está abierto. Cierra Excel y vuelve a ejecutar.")
+    for salida_tipo, estado in particiones.items():
+        if estado == "escrito":
+            print(f"🗂️ Archivo separado generado: {salida_tipo}")
+        elif estado == "sin cambios":
+            print(f"⏭️ Sin cambios, no se reescribe: {salida_tipo}")
+        else:
+            resultado.salidas_bloqueadas.append(salida_tipo)
+            print(f"❌ No se pudo escribir {salida_tipo} ({estado}). ¿Está abierto en Excel?")
+
+    print("\n✅ Consolidación completada con éxito y datos estandarizados.")
+
+
+def ejecutar_merge(frames, gui=False, base_path=base_path, parquet=True, parquet_particionado=False):
+    """MERGE + diagnóstico en consola + exportación. Convierte ErrorEstructura y SinDatasets en SystemExit."""
+    try:
+        resultado = merge(frames)
+    except ErrorEstructura as e:
+        print(e)
+        if gui:
+            mostrar_mensaje("Error de estructura", str(e), tipo="error")
+        raise SystemExit("❌ Estructura inválida. Proceso detenido.")
+    except SinDatasets as e:
+        raise SystemExit(str(e))
+
+    imprimir_diagnostico(resultado)
+    exportar(resultado, base_path=base_path, gui=gui, parquet=parquet, parquet_particionado=parquet_particionado)
+    return resultado
+
 
 # ------------------------------------------------------------
-# 7️⃣ (OPCIONAL) ARCHIVOS SEPARADOS POR TIPO
+# EJECUCIÓN DIRECTA (lee los *_limpio.xlsx de data_clean)
 # ------------------------------------------------------------
-for tipo in consolidado["TIPO_DATASET"].unique():
-    df_tipo = consolidado[consolidado["TIPO_DATASET"] == tipo]
-    salida_tipo = base_path / f"{tipo}_filtrado.xlsx"
-    df_tipo.to_excel(salida_tipo, index=False)
-    print(f"🗂️ Archivo separado generado: {salida_tipo}")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MERGE consolidado de HV / PUNTOS / PREPAGO.")
+    parser.add_argument("--gui", action="store_true",
+                        help="Muestra los avisos en ventanas emergentes (panel de control).")
+    parser.add_argument("--sin-parquet", action="store_true",
+                        help="No genera MERGE_ANS_FINAL.parquet.")
+    parser.add_argument("--parquet-particionado", action="store_true",
+                        help="Genera la salida Parquet como carpeta particionada por TIPO_DATASET.")
+    args = parser.parse_args(argv)
+
+    if args.gui:
+        aviso_inicial()
+    ejecutar_merge(
+        cargar_limpios(archivos),
+        gui=args.gui,
+        parquet=not args.sin_parquet,
+        parquet_particionado=args.parquet_particionado,
+    )
+
 
-print("\n✅ Consolidación completada con éxito y datos estandarizados.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+------------------------------------------------------------
+NORMALIZACIÓN – Motor único de limpieza de texto por columna
+------------------------------------------------------------
+Autor: Héctor + IA (2025)
+------------------------------------------------------------
+Todas las reglas de texto (MUNICIPIO, ZONA, SECTOR, ESTADO) viven aquí,
+agrupadas en perfiles. Cada perfil define, en este orden:
+  • plegar     → "–" a "-", espacios repetidos a uno y tildes fuera (tabla translate)
+  • quitar     → caracteres que se eliminan
+  • reemplazos → diccionario de valor exacto a valor canónico
+  • prefijos   → (prefijo, canónico): el primero que aplique gana
+  • vacios     → valores que terminan como vacío (NaN)
+El valor canónico se calcula una vez por valor distinto (memorizado) y la
+columna resultante queda como category.
+"""
+
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from categorias import a_categoria
+
+# ------------------------------------------------------------
+# DICCIONARIOS
+# ------------------------------------------------------------
+# Limpieza individual (escenario 1): nombres de municipio con tilde
+MUNICIPIOS_MAP = {
+    "MED": "MEDELLÍN",
+    "ITA": "ITAGÜÍ",
+    "LA EST": "LA ESTRELLA",
+    "SAB": "SABANETA",
+    "ENV": "ENVIGADO",
+}
+
+reemplazos_zona = {
+    "URBAN": "URBANA",
+    "URBANO": "URBANA",
+    "URBANA": "URBANA",
+    "RURAL": "RURAL",
+    "RURALES": "RURAL",
+    "SIN DATO": "SIN DATO",
+    "NAN": "SIN DATO",
+    "": "SIN DATO",
+    "NONE": "SIN DATO"
+}
+
+# MERGE (escenario 2): texto sin tildes
+reemplazos_sector = {
+    "OCCIDENETE": "OCCIDENTE",
+    "OCCIDENTE - OLAYA": "OCCIDENTE",
+    "OCCIDENTE - SAN CRISTOBAL": "OCCIDENTE",
+    "OCCIDENTE – AGUAS FRIAS": "OCCIDENTE",
+    "OCCIDENTE-AGUAS FRIAS": "OCCIDENTE",
+    "SUR - SABANETA": "SUR",
+    "SUR - AGIZAL": "SUR",
+    "SUR-S.PRADO": "SUR",
+    "SUR-SABANETA": "SUR",
+    "SUR ITAGUI AGIZAL": "SUR",
+    "SUR-LIMONAR": "SUR",
+    "ENV": "SUR",
+    "REPL": np.nan,
+    "NORTE": np.nan
+}
+
+reemplazos_municipio = {
+    "MED": "MEDELLIN",
+    "MEDLLIN": "MEDELLIN",
+    "ENVIG": "ENVIGADO",
+    "ENV": "ENVIGADO",
+    "SAB": "SABANETA",
+    "LA ESTRELLA": "LA ESTRELLA",
+    "CAL": "CALDAS",
+    "GUAR": "GUARNE",
+    "ESTR": "LA ESTRELLA",
+    "EL RET": "EL RETIRO",
+    "ENVI": "ENVIGADO"
+}
+
+reemplazos_estado = {
+    "VENC": "VENCIDO",
+    "VENCID": "VENCIDO",
+    "CUMP": "CUMPLIDO",
+    "ALER": "ALERTA",
+    "SINFECHA": "SIN FECHA",
+    "SIN FECHAS": "SIN FECHA"
+}
+
+prefijos_sector = [
+    ("OCCIDENTE", "OCCIDENTE"),
+    ("SUR", "SUR"),
+    ("ORIENTE", "ORIENTE"),
+    ("LA ESTRELLA", "SUR"),
+]
+
+# ------------------------------------------------------------
+# PERFILES
+# ------------------------------------------------------------
+PERFILES = {
+    # escenario1_individual.limpiar_individual
+    "MUNICIPIO_LIMPIEZA": {"reemplazos": MUNICIPIOS_MAP},
+    "ZONA": {"quitar": "-_", "reemplazos": reemplazos_zona},
+    # merge_escenario2.normalizar_texto
+    "MUNICIPIO": {"plegar": True, "reemplazos": reemplazos_municipio},
+    "SECTOR": {
+        "plegar": True,
+        "reemplazos": reemplazos_sector,
+        "prefijos": prefijos_sector,
+        "vacios": ["NAN", "NONE", "NULL", "PD.NA", "SIN DATO"],
+    },
+    "ESTADO": {"plegar": True, "reemplazos": reemplazos_estado},
+}
+
+PLEGADO = str.maketrans({"–": "-", "Á": "A", "É": "E", "Í": "I", "Ó": "O", "Ú": "U"})
+_ESPACIOS = re.compile(r"\s+")
+
+
+def compilar_perfil(reglas):
+    """Deja listas las tablas translate, tuplas de prefijos y conjuntos de vacíos del perfil."""
+    return {
+        "plegar": reglas.get("plegar", False),
+        "quitar": str.maketrans("", "", reglas.get("quitar", "")),
+        "reemplazos": reglas.get("reemplazos", {}),
+        "prefijos": tuple(reglas.get("prefijos", ())),
+        "vacios": frozenset(reglas.get("vacios", ())),
+    }
+
+
+PERFILES_COMPILADOS = {nombre: compilar_perfil(reglas) for nombre, reglas in PERFILES.items()}
+
+
+# ------------------------------------------------------------
+# MOTOR
+# ------------------------------------------------------------
+@lru_cache(maxsize=100_000, typed=True)
+def canonico(perfil, valor):
+    """Valor canónico de `valor` según el perfil (memorizado por valor)."""
+    reglas = PERFILES_COMPILADOS[perfil]
+    texto = str(valor).upper().strip()
+    if reglas["plegar"]:
+        texto = _ESPACIOS.sub(" ", texto.translate(PLEGADO))
+    texto = texto.translate(reglas["quitar"])
+
+    resultado = reglas["reemplazos"].get(texto, texto)
+    if not isinstance(resultado, str):
+        return resultado
+    for prefijo, destino in reglas["prefijos"]:
+        if resultado.startswith(prefijo):
+            resultado = destino
+            break
+    return np.nan if resultado in reglas["vacios"] else resultado
+
+
+def normalizar_columna(serie, perfil):
+    """Normaliza la columna con el perfil indicado; trabaja sobre los valores distintos y devuelve category."""
+    return a_categoria(serie, lambda unicos: unicos.map(lambda valor: canonico(perfil, valor)))
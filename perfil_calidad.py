@@ -0,0 +1,126 @@
+"""
+------------------------------------------------------------
+PERFIL DE CALIDAD – Vacíos, indicadores, duplicados y cardinalidad
+------------------------------------------------------------
+Autor: Héctor + IA (2025)
+------------------------------------------------------------
+Una sola pasada por columna (pd.factorize) sobre el DataFrame en memoria:
+  • vacíos reales (NaN / None / NaT)
+  • indicadores de vacío ("SIN DATO", "NAN", "")
+  • valores distintos
+y, con los códigos de todas las columnas, filas duplicadas, filas
+completamente vacías y filas con algún dato incompleto.
+El MERGE guarda el informe de MERGE_ANS_FINAL en data_clean/ para que
+CONTROL DE VACÍOS no tenga que volver a leer el Excel.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cache_excel import escribir_atomico
+
+# ------------------------------------------------------------
+# CONFIGURACIÓN
+# ------------------------------------------------------------
+INDICADORES_VACIO = ["SIN DATO", "NAN", ""]
+NOMBRE_INFORME = "control_vacios.pkl"
+
+
+@dataclass
+class PerfilCalidad:
+    """Resultado de perfilar(): conteos por columna y marcas por fila."""
+    filas: int
+    columnas: pd.DataFrame          # índice = columna; Vacios, Indicadores, Distintos
+    filas_duplicadas: int
+    filas_vacias: int
+    filas_incompletas: np.ndarray   # bool por fila: algún vacío o indicador
+
+    def alerta_vacios(self):
+        """Hoja ALERTA_DATOS_VACIOS del MERGE (vacíos reales por columna, de mayor a menor)."""
+        vacios = self.columnas["Vacios"]
+        return pd.DataFrame({
+            "Columna": vacios.index,
+            "Valores_Vacíos": vacios.values,
+            "Porcentaje (%)": (vacios / self.filas * 100).round(2).values if self.filas else 0.0,
+        }).sort_values(by="Valores_Vacíos", ascending=False)
+
+    def resumen_general(self):
+        """Hoja Resumen_General del MERGE."""
+        return pd.DataFrame({
+            "Métrica": [
+                "Total de registros",
+                "Filas duplicadas",
+                "Filas completamente vacías"
+            ],
+            "Valor": [self.filas, self.filas_duplicadas, self.filas_vacias]
+        })
+
+    def resumen_indicadores(self):
+        """Hoja 'Resumen Vacíos' de CONTROL DE VACÍOS (vacíos + indicadores por columna)."""
+        resumen = (self.columnas["Vacios"] + self.columnas["Indicadores"]).reset_index()
+        resumen.columns = ["Columna", "Valores_Vacíos"]
+        return resumen
+
+
+# ------------------------------------------------------------
+# PERFILADO
+# ------------------------------------------------------------
+def perfilar(df, indicadores=INDICADORES_VACIO):
+    """Perfila df en una pasada por columna y devuelve un PerfilCalidad."""
+    n = len(df)
+    codigos_columnas = []
+    conteos = {"Vacios": [], "Indicadores": [], "Distintos": []}
+    todas_vacias = np.ones(n, dtype=bool)
+    incompletas = np.zeros(n, dtype=bool)
+
+    for i in range(df.shape[1]):
+        codigos, unicos = pd.factorize(df.iloc[:, i])
+        nulo = codigos == -1
+        # Marca de indicador por valor distinto; la posición extra (código -1) es el vacío
+        es_indicador = np.append(pd.Series(np.asarray(unicos, dtype=object)).isin(indicadores).to_numpy(), False)
+        indicador = es_indicador[codigos]
+
+        conteos["Vacios"].append(int(nulo.sum()))
+        conteos["Indicadores"].append(int(indicador.sum()))
+        conteos["Distintos"].append(len(unicos))
+        todas_vacias &= nulo
+        incompletas |= nulo | indicador
+        codigos_columnas.append(codigos)
+
+    duplicadas = 0
+    if n and codigos_columnas:
+        duplicadas = int(pd.DataFrame(np.column_stack(codigos_columnas)).duplicated().sum())
+
+    return PerfilCalidad(
+        filas=n,
+        columnas=pd.DataFrame(conteos, index=pd.Index([str(c) for c in df.columns])),
+        filas_duplicadas=duplicadas,
+        filas_vacias=int(todas_vacias.sum()) if df.shape[1] else 0,
+        filas_incompletas=incompletas,
+    )
+
+
+# ------------------------------------------------------------
+# INFORME PERSISTIDO (MERGE → CONTROL DE VACÍOS)
+# ------------------------------------------------------------
+def guardar_informe(perfil, df, ruta):
+    """Guarda el perfil y las filas incompletas de df (escritura atómica)."""
+    informe = {"perfil": perfil, "incompletos": df[perfil.filas_incompletas]}
+    return escribir_atomico(ruta, lambda tmp: pd.to_pickle(informe, tmp))
+
+
+def cargar_informe(ruta, origen=None):
+    """
+    Devuelve (perfil, incompletos) guardados, o None si no existen o si `origen`
+    (p. ej. MERGE_ANS_FINAL.xlsx) es más reciente que el informe.
+    """
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return None
+    if origen is not None and Path(origen).exists() and Path(origen).stat().st_mtime > ruta.stat().st_mtime:
+        return None
+    guardado = pd.read_pickle(ruta)
+    return guardado["perfil"], guardado["incompletos"]
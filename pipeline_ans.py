@@ -0,0 +1,206 @@
+"""
+------------------------------------------------------------
+PIPELINE ANS - Limpieza (HV / PUNTOS / PREPAGO) + MERGE en un solo proceso
+------------------------------------------------------------
+Autor: Héctor + IA (2025)
+------------------------------------------------------------
+Los DataFrames limpios pasan directo de escenario1_individual al merge,
+sin escribir ni volver a leer los *_limpio.xlsx. Los archivos intermedios
+solo se generan si se piden con --guardar-intermedios.
+Con --paralelo cada dataset se lee, limpia y exporta en su propio proceso.
+Con --solo-corte no se limpia nada: se recalcula ESTADO a --fecha-corte
+sobre el último resultado limpio guardado y se vuelve a generar el MERGE.
+"""
+
+import argparse
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import escenario1_individual as escenario1
+import merge_escenario2 as merge
+
+# ------------------------------------------------------------
+# CONFIGURACIÓN DE DATASETS
+# ------------------------------------------------------------
+DATASETS = {
+    "HV": {
+        "entrada": Path("data_raw/PROGRAMACION HV SUR 2025.xlsx"),
+        "salida": Path("data_clean/HV_limpio.xlsx"),
+    },
+    "PUNTOS": {
+        "entrada": Path("data_raw/PROGRAMACION PUNTOS DE CONEXION.xlsx"),
+        "salida": Path("data_clean/PUNTOS_limpio.xlsx"),
+    },
+    "PREPAGO": {
+        "entrada": Path("data_raw/PROGRAMACION PREPAGO SUR 2025.xlsx"),
+        "salida": Path("data_clean/PREPAGO_limpio.xlsx"),
+    },
+}
+
+
+# ------------------------------------------------------------
+# ETAPAS
+# ------------------------------------------------------------
+def limpiar_datasets(datasets=DATASETS, guardar_intermedios=False, usar_cache=True, incremental=False, hoy=None):
+    """Limpia cada dataset y devuelve {nombre: DataFrame limpio}."""
+    frames = {}
+    for nombre, rutas in datasets.items():
+        inicio = time.perf_counter()
+        limpio = escenario1.leer_y_limpiar(rutas["entrada"], nombre, usar_cache=usar_cache, incremental=incremental,
+                                           hoy=hoy)
+        if guardar_intermedios:
+            escenario1.exportar_limpio(limpio, rutas["salida"])
+        frames[nombre] = limpio
+        print(f"⏱️ {nombre} limpio en {time.perf_counter() - inicio:.2f} s")
+    return frames
+
+
+def _procesar_dataset(nombre, entrada, salida, exportar=True, usar_cache=True, incremental=False, hoy=None):
+    """Trabajo de un proceso: lee, limpia y exporta un dataset, capturando su salida de consola."""
+    inicio = time.perf_counter()
+    log = io.StringIO()
+    limpio, error = None, None
+    try:
+        with redirect_stdout(log):
+            limpio = escenario1.leer_y_limpiar(entrada, nombre, usar_cache=usar_cache, incremental=incremental,
+                                               hoy=hoy)
+            if exportar:
+                escenario1.exportar_limpio(limpio, salida)
+    except (Exception, SystemExit) as e:
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "dataset": nombre,
+        "limpio": limpio,
+        "segundos": time.perf_counter() - inicio,
+        "error": error,
+        "log": log.getvalue(),
+    }
+
+
+def limpiar_en_paralelo(datasets=DATASETS, max_workers=None, exportar=True, usar_cache=True, incremental=False,
+                        hoy=None):
+    """Limpia los datasets al mismo tiempo (un proceso por dataset). Devuelve (frames, resultados)."""
+    resultados = {}
+    with ProcessPoolExecutor(max_workers=max_workers or len(datasets)) as pool:
+        futuros = [
+            pool.submit(_procesar_dataset, nombre, rutas["entrada"], rutas["salida"], exportar, usar_cache, incremental,
+                        hoy)
+            for nombre, rutas in datasets.items()
+        ]
+        for futuro in as_completed(futuros):
+            resultado = futuro.result()
+            resultados[resultado["dataset"]] = resultado
+
+    # 🔹 Salida de cada dataset en orden, seguida del resumen de tiempos y errores
+    frames = {}
+    for nombre in datasets:
+        resultado = resultados[nombre]
+        print(resultado["log"], end="")
+        if resultado["error"] is None:
+            frames[nombre] = resultado["limpio"]
+
+    print("\n⏱️ Resumen de limpieza en paralelo:")
+    for nombre in datasets:
+        resultado = resultados[nombre]
+        estado = "✅" if resultado["error"] is None else f"❌ {resultado['error']}"
+        print(f"   {nombre:<8} {resultado['segundos']:6.2f} s  {estado}")
+
+    return frames, [resultados[nombre] for nombre in datasets]
+
+
+def recalcular_corte(datasets=DATASETS, hoy=None):
+    """
+    Recalcula ESTADO a la fecha de corte sobre el último resultado limpio de cada dataset
+    (si el guardado no salió de su archivo de entrada, ese dataset se limpia completo).
+    """
+    inicio = time.perf_counter()
+    frames = {nombre: escenario1.corte_guardado(nombre, hoy, entrada=rutas["entrada"])
+              for nombre, rutas in datasets.items()}
+    corte = hoy or "ahora"
+    print(f"🕒 Estado recalculado al corte {corte} en {time.perf_counter() - inicio:.2f} s "
+          f"({sum(len(df) for df in frames.values())} pedidos).")
+    return frames
+
+
+def ejecutar_pipeline(guardar_intermedios=False, paralelo=False, solo_limpieza=False, max_workers=None, gui=False,
+                      usar_cache=True, parquet=True, parquet_particionado=False, incremental=False,
+                      hoy=None, solo_corte=False, base_path=merge.base_path):
+    """Limpieza de los tres datasets + MERGE, todo en memoria."""
+    inicio = time.perf_counter()
+    errores = []
+    if solo_corte:
+        frames = recalcular_corte(hoy=hoy)
+    elif paralelo:
+        frames, resultados = limpiar_en_paralelo(max_workers=max_workers, exportar=True, usar_cache=usar_cache,
+                                                 incremental=incremental, hoy=hoy)
+        errores = [r for r in resultados if r["error"] is not None]
+    else:
+        frames = limpiar_datasets(guardar_intermedios=guardar_intermedios, usar_cache=usar_cache,
+                                  incremental=incremental, hoy=hoy)
+
+    resultado = None
+    if not solo_limpieza:
+        Path(base_path).mkdir(parents=True, exist_ok=True)
+        resultado = merge.ejecutar_merge(frames, gui=gui, base_path=Path(base_path), parquet=parquet,
+                                         parquet_particionado=parquet_particionado)
+    print(f"\n⏱️ Pipeline completo en {time.perf_counter() - inicio:.2f} s")
+
+    if errores:
+        raise SystemExit(f"❌ {len(errores)} dataset(s) con error: {', '.join(r['dataset'] for r in errores)}")
+    return resultado
+
+
+# ------------------------------------------------------------
+# EJECUCIÓN
+# ------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Limpieza + MERGE ANS en un solo proceso.")
+    parser.add_argument("--guardar-intermedios", action="store_true",
+                        help="Exporta también los *_limpio.xlsx de cada dataset.")
+    parser.add_argument("--paralelo", action="store_true",
+                        help="Limpia HV, PUNTOS y PREPAGO al mismo tiempo (cada uno exporta su *_limpio.xlsx).")
+    parser.add_argument("--solo-limpieza", action="store_true",
+                        help="No ejecuta el MERGE.")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="Número máximo de procesos para --paralelo.")
+    parser.add_argument("--sin-cache", action="store_true",
+                        help="Lee los Excel de entrada sin usar la cache de lecturas.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Solo limpia los pedidos nuevos o modificados desde la última ejecución.")
+    parser.add_argument("--gui", action="store_true",
+                        help="Muestra los avisos del MERGE en ventanas emergentes (panel de control).")
+    parser.add_argument("--sin-parquet", action="store_true",
+                        help="No genera MERGE_ANS_FINAL.parquet.")
+    parser.add_argument("--parquet-particionado", action="store_true",
+                        help="Genera la salida Parquet como carpeta particionada por TIPO_DATASET.")
+    parser.add_argument("--fecha-corte", default=None,
+                        help="Fecha/hora de corte para ESTADO (por defecto, ahora). Ej: '2025-10-15 14:30'.")
+    parser.add_argument("--solo-corte", action="store_true",
+                        help="No limpia: recalcula ESTADO a --fecha-corte sobre el último resultado limpio y rehace el MERGE.")
+    parser.add_argument("--carpeta-salida", default=str(merge.base_path),
+                        help="Carpeta del MERGE (útil para guardar cortes históricos aparte).")
+    args = parser.parse_args()
+
+    if args.gui and not args.solo_limpieza:
+        merge.aviso_inicial()
+    ejecutar_pipeline(
+        guardar_intermedios=args.guardar_intermedios,
+        paralelo=args.paralelo,
+        solo_limpieza=args.solo_limpieza,
+        max_workers=args.procesos,
+        gui=args.gui,
+        usar_cache=not args.sin_cache,
+        parquet=not args.sin_parquet,
+        parquet_particionado=args.parquet_particionado,
+        incremental=args.incremental,
+        hoy=escenario1.leer_fecha_corte(args.fecha_corte),
+        solo_corte=args.solo_corte,
+        base_path=args.carpeta_salida,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+------------------------------------------------------------
+PLANIFICADOR ANS – Cola de trabajos del panel con dependencias
+------------------------------------------------------------
+Autor: Héctor + IA (2025)
+------------------------------------------------------------
+Cada clic del panel agrega un trabajo (una etapa de etapas_ans.py).
+Los trabajos corren en un número fijo de hilos y respetan el orden
+entre etapas relacionadas:
+  • MERGE espera a las limpiezas (HV, PUNTOS, PREPAGO) pedidas antes
+  • CONTROL espera al MERGE pedido antes
+  • TODO espera a todo lo anterior, y lo que se pida después lo espera a él
+  • una limpieza espera al MERGE / CONTROL pedido antes (no reescribe lo que están leyendo)
+  • una etapa nunca corre dos veces al mismo tiempo (escriben los mismos archivos)
+Si una dependencia termina con error o se cancela, lo que dependía de
+ella se omite (las esperas solo ordenan: no omiten nada). Pedir una etapa
+que ya está en cola no la duplica, salvo que después de ella se haya pedido
+algo que la nueva petición debe esperar.
+"""
+
+import importlib
+import threading
+import time
+from dataclasses import dataclass, replace
+
+from etapas_ans import LOGGER, ejecutar_etapa
+
+# ------------------------------------------------------------
+# CONFIGURACIÓN
+# ------------------------------------------------------------
+MAX_TRABAJADORES = 2
+
+# Etapas que deben terminar bien antes (si se pidieron antes) para que una etapa empiece
+LIMPIEZAS = {"HV", "PUNTOS", "PREPAGO"}
+DEPENDENCIAS = {
+    "HV": {"TODO"},
+    "PUNTOS": {"TODO"},
+    "PREPAGO": {"TODO"},
+    "MERGE": LIMPIEZAS | {"TODO"},
+    "CONTROL": {"MERGE", "TODO"},
+    "TODO": LIMPIEZAS | {"MERGE", "CONTROL"},
+}
+
+# Etapas que solo deben terminar antes (bien o mal): leen lo que la etapa va a reescribir
+ESPERAS = {limpieza: {"MERGE", "CONTROL"} for limpieza in LIMPIEZAS}
+
+# Módulos que se importan al arrancar (el costo en frío se paga una vez)
+MODULOS_PRECARGA = ["pandas", "openpyxl", "escenario1_individual", "merge_escenario2", "diagnostico_control"]
+
+PENDIENTE, EJECUTANDO = "pendiente", "ejecutando"
+TERMINADO, ERROR, CANCELADO, OMITIDO = "terminado", "error", "cancelado", "omitido"
+FINALES = {TERMINADO, ERROR, CANCELADO, OMITIDO}
+MOTIVOS = {ERROR: "terminó con error", CANCELADO: "fue cancelada", OMITIDO: "fue omitida"}
+
+
+@dataclass
+class Trabajo:
+    id: int
+    etapa: str
+    estado: str = PENDIENTE
+    error: str = None
+    segundos: float = 0.0
+
+
+class Planificador:
+    """
+    Ejecuta las etapas pedidas con enviar() en `max_trabajadores` hilos.
+    al_cambiar(trabajo, hechos, total) se llama (desde cualquier hilo) cada vez
+    que un trabajo cambia de estado; hechos/total cuentan los trabajos desde
+    la última vez que la cola quedó vacía. Con mostrar_mensaje, los avisos del
+    MERGE y del CONTROL usan esa función en lugar de abrir ventanas de Tk propias.
+    """
+
+    def __init__(self, max_trabajadores=MAX_TRABAJADORES, al_cambiar=None, logger=LOGGER,
+                 precargar=MODULOS_PRECARGA, mostrar_mensaje=None, ejecutar=ejecutar_etapa):
+        self.max_trabajadores = max(1, max_trabajadores)
+        self.al_cambiar = al_cambiar
+        self.logger = logger
+        self.precargar = precargar
+        self.mostrar_mensaje = mostrar_mensaje
+        self.ejecutar = ejecutar
+        self._trabajos = []  # los de la tanda actual, en orden de llegada
+        self._siguiente_id = 1
+        self._cv = threading.Condition()
+        self._listo = threading.Event()
+        self._detenido = False
+        self._hilos = []
+
+    # --------------------------------------------------------
+    # ARRANQUE
+    # --------------------------------------------------------
+    def iniciar(self):
+        threading.Thread(target=self._precargar, name="precarga-ans", daemon=True).start()
+        for i in range(self.max_trabajadores):
+            hilo = threading.Thread(target=self._bucle, name=f"trabajador-ans-{i + 1}", daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+        return self
+
+    def detener(self):
+        with self._cv:
+            self._detenido = True
+            self._cv.notify_all()
+
+    def _precargar(self):
+        inicio = time.perf_counter()
+        for modulo in self.precargar:
+            try:
+                importlib.import_module(modulo)
+            except Exception as e:  # se vuelve a intentar al ejecutar la etapa
+                self.logger.warning(f"⚠️ No se pudo precargar {modulo}: {e}")
+        if self.mostrar_mensaje is not None:
+            import merge_escenario2
+            merge_escenario2.MOSTRAR_MENSAJE = self.mostrar_mensaje
+        self.logger.info(f"⚡ Módulos cargados en {time.perf_counter() - inicio:.1f} s. Panel listo.")
+        self._listo.set()
+
+    # --------------------------------------------------------
+    # COLA
+    # --------------------------------------------------------
+    def enviar(self, etapa):
+        """
+        Agrega la etapa a la cola. Devuelve (trabajo, nuevo); nuevo=False si la
+        petición se unió a un trabajo pendiente de la misma etapa.
+        """
+        with self._cv:
+            pendiente = self._pendiente_equivalente(etapa)
+            if pendiente is not None:
+                return pendiente, False
+            if self._trabajos and all(t.estado in FINALES for t in self._trabajos):
+                self._trabajos = []  # tanda anterior terminada: el progreso empieza de nuevo
+            trabajo = Trabajo(self._siguiente_id, etapa)
+            self._siguiente_id += 1
+            self._trabajos.append(trabajo)
+            avisos = self._copias([trabajo])
+            self._cv.notify_all()
+        self._avisar(avisos)
+        return trabajo, True
+
+    def cancelar(self, etapa=None):
+        """Cancela los trabajos pendientes (de una etapa o todos). Los que ya corren terminan normalmente."""
+        with self._cv:
+            cambiados = []
+            for trabajo in self._trabajos:
+                if trabajo.estado == PENDIENTE and etapa in (None, trabajo.etapa):
+                    trabajo.estado = CANCELADO
+                    cambiados.append(trabajo)
+                    cambiados += self._omitir_dependientes(trabajo)
+            avisos = self._copias(cambiados)
+        self._avisar(avisos)
+        return sum(1 for t, _, _ in avisos if t.estado == CANCELADO)
+
+    def progreso(self):
+        with self._cv:
+            return self._progreso()
+
+    def _progreso(self):
+        return sum(1 for t in self._trabajos if t.estado in FINALES), len(self._trabajos)
+
+    def trabajos(self):
+        with self._cv:
+            return list(self._trabajos)
+
+    # --------------------------------------------------------
+    # DEPENDENCIAS
+    # --------------------------------------------------------
+    @staticmethod
+    def _bloqueantes(etapa):
+        """Etapas cuyos trabajos anteriores deben terminar antes de que `etapa` empiece."""
+        return DEPENDENCIAS.get(etapa, set()) | ESPERAS.get(etapa, set()) | {etapa}
+
+    def _pendiente_equivalente(self, etapa):
+        """
+        Último trabajo pendiente de `etapa`, si una petición nueva puede unirse a él:
+        después de ese trabajo no se pidió nada que la petición nueva tendría que esperar
+        (p. ej. MERGE pendiente, luego HV: un MERGE nuevo debe ir después de HV).
+        """
+        bloqueantes = self._bloqueantes(etapa) - {etapa}
+        for i in range(len(self._trabajos) - 1, -1, -1):
+            trabajo = self._trabajos[i]
+            if trabajo.etapa == etapa:
+                return trabajo if trabajo.estado == PENDIENTE else None
+            if trabajo.etapa in bloqueantes and trabajo.estado not in FINALES:
+                return None
+        return None
+
+    def _puede_empezar(self, trabajo):
+        """Ningún trabajo anterior de una etapa que bloquea a esta (o de la misma) sigue sin terminar."""
+        bloqueantes = self._bloqueantes(trabajo.etapa)
+        for anterior in self._trabajos:
+            if anterior is trabajo:
+                return True
+            if anterior.etapa in bloqueantes and anterior.estado not in FINALES:
+                return False
+        return True
+
+    def _omitir_dependientes(self, fallido):
+        """Marca como omitidos los pendientes posteriores que dependen de `fallido` (en cadena)."""
+        omitidos = []
+        posteriores = self._trabajos[self._trabajos.index(fallido) + 1:]
+        for trabajo in posteriores:
+            if trabajo.estado == PENDIENTE and fallido.etapa in DEPENDENCIAS.get(trabajo.etapa, set()):
+                trabajo.estado = OMITIDO
+                trabajo.error = f"depende de {fallido.etapa}, que {MOTIVOS[fallido.estado]}"
+                omitidos.append(trabajo)
+                omitidos += self._omitir_dependientes(trabajo)
+        return omitidos
+
+    # --------------------------------------------------------
+    # HILOS DE TRABAJO
+    # --------------------------------------------------------
+    def _bucle(self):
+        self._listo.wait()
+        while True:
+            with self._cv:
+                trabajo = None
+                while not self._detenido:
+                    trabajo = next((t for t in self._trabajos
+                                    if t.estado == PENDIENTE and self._puede_empezar(t)), None)
+                    if trabajo is not None:
+                        break
+                    self._cv.wait()
+                if self._detenido:
+                    return
+                trabajo.estado = EJECUTANDO
+                avisos = self._copias([trabajo])
+            self._avisar(avisos)
+
+            inicio = time.perf_counter()
+            en_paralelo = self.max_trabajadores > 1
+            error = self.ejecutar(trabajo.etapa, self.logger, prefijo=f"[{trabajo.etapa}] " if en_paralelo else "")
+
+            with self._cv:
+                trabajo.segundos = time.perf_counter() - inicio
+                trabajo.estado = TERMINADO if error is None else ERROR
+                trabajo.error = error
+                avisos = self._copias([trabajo] + (self._omitir_dependientes(trabajo) if error is not None else []))
+                self._cv.notify_all()
+            self._avisar(avisos)
+
+    def _copias(self, trabajos):
+        """Foto de los trabajos y del progreso, tomada con el candado (para avisar fuera de él)."""
+        hechos, total = self._progreso()
+        return [(replace(t), hechos, total) for t in trabajos]
+
+    def _avisar(self, avisos):
+        if self.al_cambiar is None:
+            return
+        for trabajo, hechos, total in avisos:
+            self.al_cambiar(trabajo, hechos, total)